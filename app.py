@@ -1,21 +1,21 @@
 from flask import Flask
 from flask_cors import CORS
-from modules.products.extension import db, ma, swagger
+from modules.products.extension import db, ma, swagger, cache
 from config import Config
+from json_provider import OrjsonProvider
 import os
 
 app = Flask(__name__)
 app.config.from_object(Config)
+app.json = OrjsonProvider(app)
 CORS(app)  # This enables CORS for all routes and origins by default
 
 # Initialize extensions
 db.init_app(app)
 ma.init_app(app)
 swagger.init_app(app)
+cache.init_app(app)
 
 # Register blueprints
 from modules.products.routes import products_bp
 app.register_blueprint(products_bp)
-
-if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
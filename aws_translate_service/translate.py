@@ -1,6 +1,18 @@
 import boto3
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
 
-translate_client = boto3.client("translate")
+# AWS Translate allows 20 requests per second by default
+MAX_CONCURRENT_TRANSLATIONS = 20
+
+translate_client = boto3.client(
+    "translate",
+    config=Config(
+        max_pool_connections=MAX_CONCURRENT_TRANSLATIONS,
+        retries={"max_attempts": 8, "mode": "adaptive"},
+        tcp_keepalive=True,
+    )
+)
 
 def translate(text, target_lang="ar", source_lang="en"):
     """
@@ -26,4 +38,36 @@ def translate(text, target_lang="ar", source_lang="en"):
         TargetLanguageCode = target_lang
     )
 
-    return response["TranslatedText"]
\ No newline at end of file
+    return response["TranslatedText"]
+
+
+def translate_many(texts, target_lang="ar", source_lang="en"):
+    """
+    Translate several texts concurrently using AWS Translate.
+    ---
+    Duplicate and empty strings are only sent once (empty ones not at all),
+    so a batch of product names and descriptions costs one API call per
+    distinct text.
+
+    Args:
+        texts (list[str]): The texts to translate.
+        target_lang (str, optional): The target language code (default is "ar" for Arabic).
+        source_lang (str, optional): The source language code (default is "en" for English).
+
+    Returns:
+        list[str]: The translated texts, in the same order as `texts`.
+
+    Raises:
+        botocore.exceptions.ClientError: If any AWS Translate API call fails.
+    """
+    unique_texts = list(dict.fromkeys(text for text in texts if text))
+    if not unique_texts:
+        return ["" for _ in texts]
+
+    with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_TRANSLATIONS, len(unique_texts))) as executor:
+        translated = dict(zip(
+            unique_texts,
+            executor.map(lambda text: translate(text, target_lang, source_lang), unique_texts)
+        ))
+
+    return [translated.get(text, "") if text else "" for text in texts]
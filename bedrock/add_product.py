@@ -1,20 +1,40 @@
 import os
 import requests
+from concurrent.futures import ThreadPoolExecutor
 
 from .description_generator import invoke_bedrock_description
 
 api_url = os.getenv("INVENTORY_API_URL")
 
+# Reused across calls so the inventory API POSTs share pooled TCP connections
+http_session = requests.Session()
+
+MAX_WORKERS = 16
+
+
+def _post_product(item, description):
+    payload = {
+        "name": item["name"],
+        "quantity": item["quantity"],
+        "price": item["price"],
+        "description": description
+    }
+
+    response = http_session.post(f"{api_url}/products/create", json=payload)
+    if response.status_code != 201:
+        print(f"Failed to add product: {item['name']}, Error: {response.text}")
+
+
+def _add_item(item):
+    _post_product(item, invoke_bedrock_description(item["name"]))
+
+
 def add_product_receipt(data):
-    for item in data.get("items", []):
-        description = invoke_bedrock_description(item["name"])
-        payload = {
-            "name": item["name"],
-            "quantity": item["quantity"],
-            "price": item["price"],
-            "description": description
-        }
-
-        response = requests.post(f"{api_url}/products/create", json=payload)
-        if response.status_code != 201:
-            print(f"Failed to add product: {item['name']}, Error: {response.text}")
\ No newline at end of file
+    items = data.get("items", [])
+    if not items:
+        return
+
+    # Each item is a Bedrock round-trip followed by an API call; both are
+    # I/O-bound, so run the items concurrently instead of one after another.
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(items))) as executor:
+        list(executor.map(_add_item, items))
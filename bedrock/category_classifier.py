@@ -1,34 +1,143 @@
-import boto3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
 from botocore.exceptions import ClientError
-from flask import json
 
+from .client import invoke_model
 
-def invoke_bedrock_category(product_name: str) -> str:
-    client = boto3.client("bedrock-runtime", region_name="us-east-1")
-    model_id = "anthropic.claude-3-sonnet-20240229-v1:0"
-    prompt = f"Classify this product in a category: '{product_name}'. Provide only the category name."
-
-    native_request = {
-        "anthropic_version": "bedrock-2023-05-31",
-        "max_tokens": 512,
-        "temperature": 0.5,
-        "messages": [
-            {
-                "role": "user",
-                "content": [{"type": "text", "text": prompt}],
-            }
-        ],
-    }
-
-    request = json.dumps(native_request)
+model_id = "anthropic.claude-3-sonnet-20240229-v1:0"
+
+# Request bodies are serialized once; each call splices the JSON-escaped
+# product name(s) in place of the placeholder.
+_NAME_PLACEHOLDER = b"__PRODUCT_NAME__"
+_REQUEST_TEMPLATE = orjson.dumps({
+    "anthropic_version": "bedrock-2023-05-31",
+    "max_tokens": 512,
+    "temperature": 0,
+    "messages": [
+        {
+            "role": "user",
+            "content": [{"type": "text", "text": "Classify this product in a category: '__PRODUCT_NAME__'. Provide only the category name."}],
+        }
+    ],
+})
+
+
+_NAMES_PLACEHOLDER = b"__PRODUCT_NAMES__"
+_BATCH_REQUEST_TEMPLATE = orjson.dumps({
+    "anthropic_version": "bedrock-2023-05-31",
+    "max_tokens": 2048,
+    "temperature": 0,
+    "messages": [
+        {
+            "role": "user",
+            "content": [{"type": "text", "text": (
+                "Classify each of these products in a category: __PRODUCT_NAMES__. "
+                "Reply with only a JSON array of category names, one per product, in the same order."
+            )}],
+        }
+    ],
+})
+
+# Names per batched prompt (keeps the reply well under max_tokens), and how
+# many prompts / fallback single-name calls run at once.
+CATEGORY_BATCH_SIZE = 50
+MAX_CONCURRENT_CLASSIFICATIONS = 8
+
+
+# Product names recur across receipts and re-uploads, so answers are cached
+# per name, for single and batched classification alike. Temperature is 0 to
+# keep the cached answer deterministic; failed invocations are never cached.
+CATEGORY_CACHE_SIZE = 4096
+_category_cache = OrderedDict()
+_category_cache_lock = threading.Lock()
 
+
+def cached_category(product_name: str):
+    """Category already known for this name, or None without calling Bedrock."""
+    with _category_cache_lock:
+        category = _category_cache.get(product_name)
+        if category is not None:
+            _category_cache.move_to_end(product_name)
+        return category
+
+
+def _remember_category(product_name: str, category: str):
+    with _category_cache_lock:
+        _category_cache[product_name] = category
+        _category_cache.move_to_end(product_name)
+        while len(_category_cache) > CATEGORY_CACHE_SIZE:
+            _category_cache.popitem(last=False)
+
+
+def _classify_product(product_name: str) -> str:
+    body = _REQUEST_TEMPLATE.replace(_NAME_PLACEHOLDER, orjson.dumps(product_name)[1:-1])
+    response = invoke_model(modelId=model_id, body=body)
+
+    model_response = orjson.loads(response["body"].read())
+    response_text = model_response["content"][0]["text"].strip()
+    print(f"Bedrock response: {response_text}")
+    _remember_category(product_name, response_text)
+    return response_text
+
+
+def invoke_bedrock_category(product_name: str) -> str:
+    category = cached_category(product_name)
+    if category is not None:
+        return category
     try:
-        response = client.invoke_model(modelId=model_id, body=request)
+        return _classify_product(product_name)
     except (ClientError, Exception) as e:
         print(f"ERROR: Can't invoke '{model_id}'. Reason: {e}")
         return None
 
-    model_response = json.loads(response["body"].read())
-    response_text = model_response["content"][0]["text"].strip()
-    print(f"Bedrock response: {response_text}")
-    return response_text
+
+def _classify_chunk(product_names: list[str]) -> list[str]:
+    # The names are sent as a JSON array, escaped once more to sit inside the
+    # pre-serialized prompt string.
+    names_json = orjson.dumps(orjson.dumps(product_names).decode())[1:-1]
+    body = _BATCH_REQUEST_TEMPLATE.replace(_NAMES_PLACEHOLDER, names_json)
+    try:
+        response = invoke_model(modelId=model_id, body=body)
+        response_text = orjson.loads(response["body"].read())["content"][0]["text"]
+        categories = orjson.loads(response_text[response_text.index("["):response_text.rindex("]") + 1])
+        if len(categories) != len(product_names) or not all(isinstance(c, str) for c in categories):
+            raise ValueError(f"expected {len(product_names)} categories, got {categories!r}")
+        print(f"Bedrock response: {len(categories)} categories")
+        categories = [category.strip() for category in categories]
+        for product_name, category in zip(product_names, categories):
+            _remember_category(product_name, category)
+        return categories
+    except (ClientError, Exception) as e:
+        # An unusable batch answer falls back to one (cached) call per name
+        print(f"ERROR: Batch classification with '{model_id}' failed, classifying one by one. Reason: {e}")
+        with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_CLASSIFICATIONS, len(product_names))) as executor:
+            return list(executor.map(invoke_bedrock_category, product_names))
+
+
+def invoke_bedrock_category_batch(product_names: list[str]) -> list[str]:
+    """
+    Classify several products with one Bedrock call per CATEGORY_BATCH_SIZE names.
+    ---
+    Args:
+        product_names (list[str]): Product names to classify.
+
+    Returns:
+        list[str]: One category per name, in the same order (None where a
+                   fallback single-name call failed).
+    """
+    categories = {name: cached_category(name) for name in product_names}
+    uncached = [name for name, category in categories.items() if category is None]
+
+    if uncached:
+        chunks = [
+            uncached[i:i + CATEGORY_BATCH_SIZE]
+            for i in range(0, len(uncached), CATEGORY_BATCH_SIZE)
+        ]
+        with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_CLASSIFICATIONS, len(chunks))) as executor:
+            for chunk, chunk_categories in zip(chunks, executor.map(_classify_chunk, chunks)):
+                categories.update(zip(chunk, chunk_categories))
+
+    return [categories[name] for name in product_names]
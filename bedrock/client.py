@@ -0,0 +1,94 @@
+import os
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+# Shared Bedrock runtime client. boto3 clients are thread-safe, so a single
+# module-level instance lets every helper reuse the same connection pool
+# instead of paying credential resolution and TLS setup on each call.
+# The pool is sized above the thread-pool fan-out used by the batch helpers,
+# and adaptive retries back off client-side when Bedrock throttles.
+BEDROCK_CONFIG = Config(
+    max_pool_connections=64,
+    retries={"max_attempts": 8, "mode": "adaptive"},
+    tcp_keepalive=True,
+    read_timeout=120,
+)
+
+bedrock_runtime = boto3.client(
+    "bedrock-runtime",
+    region_name="us-east-1",
+    config=BEDROCK_CONFIG
+)
+
+# Request latency-optimized inference (set BEDROCK_LATENCY_OPTIMIZED=false to
+# always use standard inference, e.g. when the extra pricing is unwanted).
+LATENCY_OPTIMIZED = os.getenv("BEDROCK_LATENCY_OPTIMIZED", "true").lower() not in ("0", "false", "no")
+
+# Models that rejected latency-optimized inference (unsupported model/region);
+# remembered so later calls skip straight to standard inference.
+_latency_unsupported = set()
+
+
+def _is_latency_unsupported(error):
+    """True if Bedrock rejected the latency-optimized flag itself, not something else in the request."""
+    details = error.response.get("Error", {})
+    message = details.get("Message", "").lower()
+    return details.get("Code") == "ValidationException" and ("performanceconfig" in message or "latency" in message)
+
+
+def invoke_model(modelId, **kwargs):
+    """
+    Invoke a Bedrock model with latency-optimized inference when available.
+    ---
+    Latency-optimized inference is only offered for some model/region
+    combinations (e.g. us-east-2). When Bedrock rejects the flag with a
+    ValidationException naming performanceConfig/latency, the call is retried
+    with standard inference and the model is not offered the flag again for
+    the lifetime of the process. Any other error is raised unchanged.
+    Disabled entirely when `LATENCY_OPTIMIZED` is off.
+
+    Args:
+        modelId (str): The Bedrock model identifier.
+        **kwargs: Extra keyword arguments forwarded to `invoke_model`.
+
+    Returns:
+        dict: The raw `invoke_model` response.
+    """
+    if LATENCY_OPTIMIZED and modelId not in _latency_unsupported:
+        try:
+            return bedrock_runtime.invoke_model(
+                modelId=modelId, performanceConfigLatency="optimized", **kwargs
+            )
+        except ClientError as e:
+            if not _is_latency_unsupported(e):
+                raise
+            _latency_unsupported.add(modelId)
+
+    return bedrock_runtime.invoke_model(modelId=modelId, **kwargs)
+
+
+def converse(modelId, **kwargs):
+    """
+    Call the Bedrock Converse API with latency-optimized inference when available.
+    ---
+    Falls back to standard inference the same way as `invoke_model`.
+
+    Args:
+        modelId (str): The Bedrock model identifier.
+        **kwargs: Extra keyword arguments forwarded to `converse`.
+
+    Returns:
+        dict: The raw `converse` response.
+    """
+    if LATENCY_OPTIMIZED and modelId not in _latency_unsupported:
+        try:
+            return bedrock_runtime.converse(
+                modelId=modelId, performanceConfig={"latency": "optimized"}, **kwargs
+            )
+        except ClientError as e:
+            if not _is_latency_unsupported(e):
+                raise
+            _latency_unsupported.add(modelId)
+
+    return bedrock_runtime.converse(modelId=modelId, **kwargs)
@@ -1,34 +1,42 @@
-import boto3
+from functools import lru_cache
+
+import orjson
 from botocore.exceptions import ClientError
-from flask import json
 
+from .client import invoke_model
 
-def invoke_bedrock_description(product_name: str) -> str:
-    client = boto3.client("bedrock-runtime", region_name="us-east-1")
-    model_id = "anthropic.claude-3-sonnet-20240229-v1:0"
-    prompt = f"Describe this product: '{product_name}'. Use only one sentence."
-
-    native_request = {
-        "anthropic_version": "bedrock-2023-05-31",
-        "max_tokens": 512,
-        "temperature": 0.5,
-        "messages": [
-            {
-                "role": "user",
-                "content": [{"type": "text", "text": prompt}],
-            }
-        ],
-    }
-
-    request = json.dumps(native_request)
+model_id = "anthropic.claude-3-sonnet-20240229-v1:0"
 
-    try:
-        response = client.invoke_model(modelId=model_id, body=request)
-    except (ClientError, Exception) as e:
-        print(f"ERROR: Can't invoke '{model_id}'. Reason: {e}")
-        return ""
+# Pre-serialized like the category classifier's request bodies
+_NAME_PLACEHOLDER = b"__PRODUCT_NAME__"
+_REQUEST_TEMPLATE = orjson.dumps({
+    "anthropic_version": "bedrock-2023-05-31",
+    "max_tokens": 512,
+    "temperature": 0,
+    "messages": [
+        {
+            "role": "user",
+            "content": [{"type": "text", "text": "Describe this product: '__PRODUCT_NAME__'. Use only one sentence."}],
+        }
+    ],
+})
+
+
+# Failed invocations raise, so only real descriptions are cached
+@lru_cache(maxsize=4096)
+def _describe_product(product_name: str) -> str:
+    body = _REQUEST_TEMPLATE.replace(_NAME_PLACEHOLDER, orjson.dumps(product_name)[1:-1])
+    response = invoke_model(modelId=model_id, body=body)
 
-    model_response = json.loads(response["body"].read())
+    model_response = orjson.loads(response["body"].read())
     response_text = model_response["content"][0]["text"].strip()
     print(f"Bedrock response: {response_text}")
     return response_text
+
+
+def invoke_bedrock_description(product_name: str) -> str:
+    try:
+        return _describe_product(product_name)
+    except (ClientError, Exception) as e:
+        print(f"ERROR: Can't invoke '{model_id}'. Reason: {e}")
+        return ""
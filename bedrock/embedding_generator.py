@@ -1,7 +1,34 @@
-import boto3
-from flask import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import numpy as np
+import orjson
 
-def invoke_bedrock_embedding(text: str) -> list[float]:
+from .client import bedrock_runtime
+
+# Titan embeddings accept a single input per call, so batches fan out
+# concurrently; 20 in-flight requests stays under the default Bedrock TPS.
+MAX_CONCURRENT_EMBEDDINGS = 20
+
+
+# Titan embeddings are deterministic, so vectors are cached per exact input
+# text; failed invocations raise and are never cached. Entries are read-only
+# float32 arrays (~4 KB each, ~40 MB when full) shared by every caller.
+# Titan embedding models are not offered latency-optimized inference, so this
+# calls the client directly rather than the client.invoke_model wrapper.
+@lru_cache(maxsize=10000)
+def _cached_embed(text: str) -> np.ndarray:
+    response = bedrock_runtime.invoke_model(
+        modelId='amazon.titan-embed-text-v2:0',
+        contentType='application/json',
+        body=orjson.dumps({"inputText": text})
+    )
+    embedding = orjson.loads(response['body'].read()).get('embedding', [])
+    print(f"Embedding: {len(embedding)} dimensions")
+    embedding = np.asarray(embedding, dtype=np.float32)
+    embedding.setflags(write=False)
+    return embedding
+
+def invoke_bedrock_embedding(text: str) -> np.ndarray:
     """
     Invoke Amazon Bedrock Titan Text Embedding Model to generate embeddings.
 
@@ -14,7 +41,7 @@ def invoke_bedrock_embedding(text: str) -> list[float]:
         description: Input text string to generate embedding for.
     responses:
       200:
-        description: List of floats representing the embedding vector.
+        description: Read-only float32 array holding the embedding vector (shared with the cache; copy before modifying).
         schema:
           type: array
           items:
@@ -23,22 +50,31 @@ def invoke_bedrock_embedding(text: str) -> list[float]:
       500:
         description: Error occurred while invoking Bedrock.
     """
-    bedrock_client = boto3.client("bedrock-runtime", region_name="us-east-1")
     if not text:
-        return []
-
-    payload = {"inputText": text}
+        return np.empty(0, dtype=np.float32)
 
     try:
-        response = bedrock_client.invoke_model(
-            modelId='amazon.titan-embed-text-v2:0',
-            contentType='application/json',
-            body=json.dumps(payload)
-        )
-        response_body = response['body'].read()
-        embedding_result = json.loads(response_body)
-        print("Embedding:", embedding_result.get('embedding', []))
-        return embedding_result.get('embedding', [])
+        return _cached_embed(text)
     except Exception as e:
         print(f"Bedrock invocation failed: {e}")
-        raise
\ No newline at end of file
+        raise
+
+def invoke_bedrock_embeddings_batch(texts: list[str]) -> list[np.ndarray]:
+    """
+    Generate embeddings for several texts concurrently.
+
+    ---
+    Args:
+        texts (list[str]): Input strings to embed.
+
+    Returns:
+        list[np.ndarray]: One read-only embedding per input text, in the same order.
+
+    Raises:
+        Exception: If any Bedrock invocation fails.
+    """
+    if not texts:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_EMBEDDINGS, len(texts))) as executor:
+        return list(executor.map(invoke_bedrock_embedding, texts))
@@ -1,11 +1,9 @@
-import boto3
-import json
+import orjson
 from botocore.exceptions import ClientError
 
-def process_receipt(pdf_bytes, name):
-    # Set up Bedrock runtime client
-    client = boto3.client("bedrock-runtime", region_name="us-east-1")
+from .client import converse
 
+def process_receipt(pdf_bytes, name):
     # Hardcoded model ID (Claude 3 Sonnet)
     model_id = "anthropic.claude-3-sonnet-20240229-v1:0"
 
@@ -38,7 +36,7 @@ def process_receipt(pdf_bytes, name):
 
     try:
         # Send the message to the model
-        response = client.converse(
+        response = converse(
             modelId=model_id,
             messages=conversation,
             inferenceConfig={
@@ -56,7 +54,7 @@ def process_receipt(pdf_bytes, name):
         print("Claude response:", text_response)
 
         # Parse it as JSON
-        return json.loads(text_response)
+        return orjson.loads(text_response)
 
     except (ClientError, Exception) as e:
         print(f"ERROR: Failed to invoke Claude. Reason: {e}")
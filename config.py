@@ -1,18 +1,26 @@
 import boto3
 import json
+import os
+from functools import lru_cache
 from botocore.exceptions import ClientError
 
+session = boto3.session.Session()
+
+
+@lru_cache(maxsize=1)
 def get_postgresql_secrets(secret_name="<secret-name>", region_name="us-east-1"):
     """
     Fetch PostgreSQL connection credentials from AWS Secrets Manager.
 
+    The result is cached for the lifetime of the process, so the Secrets
+    Manager round-trip happens at most once per worker.
+
     Returns:
         dict: Dictionary with keys: username, password, host, port, dbname
     Raises:
         ClientError: If retrieval fails.
     """
     try:
-        session = boto3.session.Session()
         client = session.client(
             service_name='secretsmanager',
             region_name=region_name
@@ -35,13 +43,77 @@ def get_postgresql_secrets(secret_name="<secret-name>", region_name="us-east-1")
         print(f"❌ Error retrieving secret from Secrets Manager: {e}")
         raise e
 
-# Retrieve the secrets
-secrets = get_postgresql_secrets()
+def get_database_uri():
+    """
+    Build the SQLAlchemy database URI.
 
-# Build SQLAlchemy config from the secret
-class Config:
-    SQLALCHEMY_DATABASE_URI = (
+    A `DATABASE_URL` environment variable (e.g. injected by the container
+    platform) takes precedence and skips Secrets Manager entirely; otherwise
+    the URI is assembled from the PostgreSQL secret.
+
+    Returns:
+        str: SQLAlchemy connection URI.
+    """
+    database_url = os.getenv("DATABASE_URL")
+    if database_url:
+        return database_url
+
+    secrets = get_postgresql_secrets()
+    return (
         f"postgresql+psycopg2://{secrets['username']}:{secrets['password']}@"
         f"{secrets['host']}:{secrets['port']}/{secrets['dbname']}"
     )
+
+
+# Session settings applied to every pooled connection when it is opened
+STATEMENT_TIMEOUT_MS = 5000
+HNSW_EF_SEARCH = 40  # HNSW candidate list size for similarity searches (pgvector default)
+# pgvector >= 0.8 only: keep walking the HNSW graph until enough rows pass the
+# searches' filters ("strict_order" or "relaxed_order"); unset leaves it off.
+HNSW_ITERATIVE_SCAN = os.getenv("HNSW_ITERATIVE_SCAN")
+
+# Per-worker connection pool. Size it so pool_size + max_overflow, times the
+# number of gunicorn workers, stays below the server's max_connections.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 20))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+
+
+def get_connection_options():
+    """
+    Build the libpq `options` string sent when each connection is opened.
+    ---
+    Returns:
+        str: `-c name=value` settings for the Postgres session.
+    """
+    options = f"-c statement_timeout={STATEMENT_TIMEOUT_MS} -c hnsw.ef_search={HNSW_EF_SEARCH}"
+    if HNSW_ITERATIVE_SCAN:
+        options += f" -c hnsw.iterative_scan={HNSW_ITERATIVE_SCAN}"
+    return options
+
+
+# Build SQLAlchemy config from the secret
+class Config:
+    SQLALCHEMY_DATABASE_URI = get_database_uri()
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        # Batch executemany UPDATEs (bulk embedding/category/translation
+        # writes) into few round-trips via psycopg2's execute_batch
+        "executemany_mode": "values_plus_batch",
+        "insertmanyvalues_page_size": 1000,
+        # Keep connections open between requests; pre-ping replaces ones the
+        # server or a load balancer dropped, and recycling bounds their age.
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_pre_ping": True,
+        "pool_recycle": DB_POOL_RECYCLE,
+        # Sent as libpq startup options, so each connection arrives tuned
+        # without an extra SET round-trip per connection or per query
+        "connect_args": {
+            "options": get_connection_options(),
+        },
+    }
+
+    # Short-lived in-process cache for the read-only analytics endpoints
+    CACHE_TYPE = "SimpleCache"
+    CACHE_DEFAULT_TIMEOUT = 30
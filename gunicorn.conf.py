@@ -0,0 +1,28 @@
+import multiprocessing
+import os
+
+# Production server settings for `gunicorn app:app`.
+# Requests spend most of their time waiting on Bedrock, Translate and
+# Postgres, so each worker runs several threads to keep serving other
+# requests while one is blocked on I/O.
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count()))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+
+# With GUNICORN_WORKER_CLASS=gevent each worker multiplexes many concurrent
+# Bedrock/DB waits on greenlets instead of OS threads.
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 1000))
+
+# Load the app once in the master before forking so the database secret is
+# fetched a single time and shared by every worker. gevent must monkey-patch
+# before boto3/requests are imported, so it loads the app in each worker.
+preload_app = worker_class != "gevent"
+
+
+def post_fork(server, worker):
+    if worker_class == "gevent":
+        # psycopg2 is a C extension and needs explicit gevent support
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
@@ -0,0 +1,40 @@
+import decimal
+
+import orjson
+from flask.json.provider import JSONProvider
+
+# numpy arrays (pgvector embeddings) are serialized natively, without
+# converting them to Python lists first.
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    # Mirror Flask's default provider for types orjson does not handle
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if hasattr(obj, "__html__"):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    Flask JSON provider backed by orjson.
+
+    Used for `jsonify` and `request.get_json`; large payloads such as
+    embedding arrays are encoded in C rather than by the stdlib encoder.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=ORJSON_OPTIONS, default=_default).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Hand orjson's bytes straight to the response, skipping the str round-trip
+        return self._app.response_class(
+            orjson.dumps(obj, option=ORJSON_OPTIONS, default=_default),
+            mimetype="application/json"
+        )
@@ -0,0 +1,7 @@
+-- HNSW index for the similarity_by_id / similarity_by_name searches.
+-- vector_cosine_ops matches the <=> operator both queries order by.
+-- CONCURRENTLY avoids locking writes; run outside a transaction block.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_embedding_hnsw
+    ON inventory.products
+    USING hnsw (embedding vector_cosine_ops)
+    WITH (m = 16, ef_construction = 64);
@@ -0,0 +1,12 @@
+-- Store embeddings as half-precision halfvec(1024) to halve storage and the
+-- bytes read by HNSW distance computations. The HNSW index is rebuilt with
+-- the matching halfvec operator class.
+DROP INDEX IF EXISTS inventory.ix_products_embedding_hnsw;
+
+ALTER TABLE inventory.products
+    ALTER COLUMN embedding TYPE halfvec(1024) USING embedding::halfvec(1024);
+
+CREATE INDEX IF NOT EXISTS ix_products_embedding_hnsw
+    ON inventory.products
+    USING hnsw (embedding halfvec_cosine_ops)
+    WITH (m = 16, ef_construction = 64);
@@ -0,0 +1,6 @@
+-- Covering index for value_per_category / total_products_per_category:
+-- price and quantity ride along in the leaf pages, allowing index-only scans.
+-- CONCURRENTLY avoids locking writes; run outside a transaction block.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_category_price_quantity
+    ON inventory.products (category)
+    INCLUDE (price, quantity);
@@ -0,0 +1,12 @@
+-- Partial index for out_of_stock: only rows matching the service's filter are
+-- indexed, so the lookup touches the out-of-stock set rather than the table.
+-- The predicate must stay identical to the query's WHERE clause.
+-- CONCURRENTLY avoids locking writes; run outside a transaction block.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_out_of_stock
+    ON inventory.products (id)
+    WHERE quantity = 0 OR in_stock = false;
+
+-- most_expensive: ORDER BY price DESC LIMIT 5 reads the first entries of
+-- this index instead of sorting the whole table.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_price_desc
+    ON inventory.products (price DESC);
@@ -0,0 +1,17 @@
+-- Derive in_stock from quantity in Postgres instead of keeping a separately
+-- written flag in sync from the application. Dropping the old column also
+-- drops ix_products_out_of_stock, whose predicate referenced it; out-of-stock
+-- rows are indexed by the simpler NOT in_stock predicate instead.
+-- Rewrites the table; run during a maintenance window.
+BEGIN;
+
+ALTER TABLE inventory.products DROP COLUMN in_stock;
+ALTER TABLE inventory.products
+    ADD COLUMN in_stock boolean GENERATED ALWAYS AS (quantity > 0) STORED;
+
+DROP INDEX IF EXISTS inventory.ix_products_out_of_stock;
+CREATE INDEX ix_products_in_stock_false
+    ON inventory.products (id)
+    WHERE NOT in_stock;
+
+COMMIT;
@@ -0,0 +1,21 @@
+-- Rank similarity by inner product (<#>) instead of cosine distance (<=>).
+-- The application now stores unit-length embeddings, for which both give
+-- the same order, and inner product skips computing norms on every
+-- comparison. Existing rows are normalized first (Titan v2 output already
+-- is, up to halfvec rounding), then the HNSW index is rebuilt with the
+-- inner-product operator class.
+UPDATE inventory.products
+SET embedding = l2_normalize(embedding)
+WHERE embedding IS NOT NULL;
+
+DROP INDEX IF EXISTS inventory.ix_products_embedding_hnsw;
+
+CREATE INDEX IF NOT EXISTS ix_products_embedding_hnsw
+    ON inventory.products
+    USING hnsw (embedding halfvec_ip_ops)
+    WITH (m = 16, ef_construction = 64);
+
+-- Optional invariant check for test databases (not enabled in production,
+-- as it costs a norm computation per write):
+-- ALTER TABLE inventory.products ADD CONSTRAINT ck_products_embedding_unit
+--     CHECK (embedding IS NULL OR abs(1 + (embedding <#> embedding)) < 1e-2);
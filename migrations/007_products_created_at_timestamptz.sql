@@ -0,0 +1,7 @@
+-- Let Postgres stamp created_at (now(), timezone-aware) instead of the
+-- application's naive local datetime. Existing values were written by UTC
+-- containers and are interpreted as UTC.
+ALTER TABLE inventory.products
+    ALTER COLUMN created_at TYPE timestamptz USING created_at AT TIME ZONE 'UTC',
+    ALTER COLUMN created_at SET DEFAULT now(),
+    ALTER COLUMN created_at SET NOT NULL;
@@ -0,0 +1,14 @@
+-- 256-d prefix of each embedding for a cheaper first-pass HNSW search;
+-- similarity_by_name reranks its candidates on the full 1024-d vector.
+-- Existing rows are backfilled from their full (unit-length) embedding.
+ALTER TABLE inventory.products ADD COLUMN IF NOT EXISTS embedding_short halfvec(256);
+
+UPDATE inventory.products
+SET embedding_short = l2_normalize(subvector(embedding, 1, 256))
+WHERE embedding IS NOT NULL;
+
+-- CONCURRENTLY avoids locking writes; run outside a transaction block.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_embedding_short_hnsw
+    ON inventory.products
+    USING hnsw (embedding_short halfvec_ip_ops)
+    WITH (m = 16, ef_construction = 64);
@@ -0,0 +1,15 @@
+-- Per-category aggregates for the analytics endpoints, so dashboard reads
+-- scan one row per category instead of the whole products table. The app
+-- refreshes it shortly after writes; the unique index is what allows
+-- REFRESH ... CONCURRENTLY, which does not block readers.
+CREATE MATERIALIZED VIEW IF NOT EXISTS inventory.category_stats AS
+SELECT
+    category,
+    count(*) AS product_count,
+    sum(price) AS total_price,
+    sum(price * quantity) AS total_value
+FROM inventory.products
+GROUP BY category;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_category_stats_category
+    ON inventory.category_stats (category);
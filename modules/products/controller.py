@@ -1,4 +1,4 @@
-from flask import request, jsonify
+from flask import current_app, request, jsonify
 from marshmallow import ValidationError
 
 from .services import (
@@ -9,10 +9,15 @@ from .services import (
     add_product_service,
     health_status_service,
     similarity_search_by_id_service,
+    similarity_search_batch_service,
     similarity_search_by_name_service,
     translate_name_description_service,
     update_product_service,
     delete_product_service,
+    update_products_bulk_service,
+    delete_products_bulk_service,
+    missing_product_ids_service,
+    encode_embedding_float16,
     total_value_service,
     avg_product_price_service,
     min_max_price_service,
@@ -24,7 +29,20 @@ from .services import (
 
 from .validation import validate_input
 
-from .middleware import BatchIDsSchema, ProductSchema
+from .middleware import ProductSchema, batch_ids_schema, bulk_update_schema, similarity_batch_schema
+
+
+def _json_response(body):
+    """Send JSON text that the database already built, without re-encoding it."""
+    return current_app.response_class(body, mimetype="application/json")
+
+
+def _ids_not_found(product_ids):
+    """404 response for a batch request, listing the ids that do not exist."""
+    return jsonify({
+        "error": "Some product IDs not found",
+        "missing_ids": missing_product_ids_service(product_ids),
+    }), 404
 
 
 def add_product():
@@ -43,20 +61,17 @@ def add_product():
     if errors:
         return jsonify({"errors": errors}), 400
     
-    return jsonify(add_product_service(valid_data).to_dict()), 201
+    return jsonify(add_product_service(valid_data)), 201
 
 
 def get_products():
     """
     Controller to retrieve all products.
 
-    - Calls the service layer to fetch all products.
-    - Converts each product object to a dictionary.
+    - Calls the service layer to fetch all products as dictionaries.
     - Returns the list of product dictionaries as JSON with status 200.
     """
-    products = get_products_service()
-    products_list = [product.to_dict() for product in products]
-    return jsonify(products_list), 200
+    return jsonify(get_products_service()), 200
 
 
 def get_product(id):
@@ -66,14 +81,19 @@ def get_product(id):
     Args:
         id (int): The ID of the product to retrieve.
 
+    Query parameters:
+        with_embedding (bool): Include the embedding vector in the response.
+
     Returns:
         JSON response containing the product data with status 200 if found.
         Otherwise, returns a 404 response with a 'Product not found' message.
     """
-    product = get_product_service(id)
+    with_embedding = request.args.get("with_embedding", "false").lower() in ("1", "true")
+
+    product = get_product_service(id, include_embedding=with_embedding)
     if product is None:
         return jsonify({"message": "Product not found"}), 404
-    return jsonify(product.to_dict()), 200
+    return jsonify(product.to_dict(include_embedding=with_embedding)), 200
 
 
 def update_product(id): 
@@ -123,7 +143,7 @@ def update_product(id):
     if not product:
         return jsonify({"message": "Product not found"}), 404
 
-    return jsonify(product.to_dict()), 200
+    return jsonify(product), 200
 
 
 def delete_product(id):
@@ -142,7 +162,52 @@ def delete_product(id):
     if not product:
         return jsonify({"message": "Product not found"}), 404
 
-    return jsonify(product.to_dict()), 200
+    return jsonify(product), 200
+
+
+def update_products_bulk():
+    """
+    Update several products in one request.
+
+    Each item carries the product id plus only the fields to change, as in a
+    single-product update. Nothing is written if any id is missing.
+
+    Returns:
+        JSON response with the updated products and status 200.
+        400 on validation errors, 404 if some product IDs were not found.
+    """
+    try:
+        data = bulk_update_schema.load(request.get_json())
+    except ValidationError as err:
+        return jsonify({"errors": err.messages}), 400
+
+    updated = update_products_bulk_service(data['products'])
+    if updated is None:
+        return _ids_not_found([item['id'] for item in data['products']])
+
+    return jsonify({"updated_products": updated}), 200
+
+
+def delete_products_bulk():
+    """
+    Delete several products in one request.
+
+    Nothing is deleted if any id is missing.
+
+    Returns:
+        JSON response with the deleted products and status 200.
+        400 on validation errors, 404 if some product IDs were not found.
+    """
+    try:
+        data = batch_ids_schema.load(request.get_json())
+    except ValidationError as err:
+        return jsonify(err.messages), 400
+
+    deleted = delete_products_bulk_service(data['product_ids'])
+    if deleted is None:
+        return _ids_not_found(data['product_ids'])
+
+    return jsonify({"deleted_products": deleted}), 200
 
 
 def total_value():
@@ -225,7 +290,7 @@ def total_nb_of_products_category():
                 type: integer
                 example: 42
     """
-    return jsonify(total_nb_of_products_category_service()), 200
+    return _json_response(total_nb_of_products_category_service()), 200
 
 
 def out_of_stock():
@@ -259,7 +324,7 @@ def out_of_stock():
                 type: string
                 example: "Accessories"
     """
-    return jsonify(out_of_stock_service()), 200
+    return _json_response(out_of_stock_service()), 200
 
 
 def most_expensive_products():
@@ -293,7 +358,7 @@ def most_expensive_products():
                 type: string
                 example: "Electronics"
     """
-    return jsonify(most_expensive_products_service()), 200
+    return _json_response(most_expensive_products_service()), 200
 
 
 def value_per_category():
@@ -318,7 +383,7 @@ def value_per_category():
                 format: float
                 example: 123456.78
     """
-    return jsonify(value_per_category_service()), 200
+    return _json_response(value_per_category_service()), 200
 
 
 def classify_batch():
@@ -368,9 +433,10 @@ def classify_batch():
           type: object
           example:
             error: "Some product IDs not found"
+            missing_ids: [3]
     """
     try:
-        data = BatchIDsSchema().load(request.get_json())
+        data = batch_ids_schema.load(request.get_json())
     except ValidationError as err:
         return jsonify(err.messages), 400
 
@@ -378,11 +444,9 @@ def classify_batch():
     updated = classify_batch_service(product_ids)
 
     if updated is None:
-        return jsonify({"error": "Some product IDs not found"}), 404
+        return _ids_not_found(product_ids)
 
-    updated_dicts = [product.to_dict() for product in updated]
-
-    return jsonify({"updated_products": updated_dicts}), 200
+    return jsonify({"updated_products": updated}), 200
 
 
 def health_status():
@@ -455,7 +519,7 @@ def translate_name_description():
         description: Internal server error
     """
     try:
-        data = BatchIDsSchema().load(request.get_json())
+        data = batch_ids_schema.load(request.get_json())
     except ValidationError as err:
         return jsonify(err.messages), 400
 
@@ -463,11 +527,9 @@ def translate_name_description():
     updated = translate_name_description_service(product_ids)
 
     if updated is None:
-        return jsonify({"error": "Some product IDs not found"}), 404
+        return _ids_not_found(product_ids)
 
-    updated_dicts = [product.to_dict() for product in updated]
-
-    return jsonify({"updated_products": updated_dicts}), 200
+    return jsonify({"updated_products": updated}), 200
 
 
 def generate_embedding():
@@ -494,6 +556,12 @@ def generate_embedding():
               description: List of product IDs to generate embeddings for
           required:
             - product_ids
+      - name: encoding
+        in: query
+        type: string
+        required: false
+        enum: [float16]
+        description: Return each embedding as base64-encoded little-endian float16 bytes instead of a list of numbers
     responses:
       200:
         description: Successfully generated and updated embeddings
@@ -509,7 +577,11 @@ def generate_embedding():
                     type: array
                     items:
                       type: number
-                    description: Vector embedding for the product name
+                    description: Vector embedding for the product name (a base64 string when encoding=float16)
+                  dtype:
+                    type: string
+                    example: float16
+                    description: Only present when encoding=float16
       400:
         description: Validation error or bad request
       404:
@@ -518,7 +590,7 @@ def generate_embedding():
         description: Internal server error
     """
     try:
-        data = BatchIDsSchema().load(request.get_json())
+        data = batch_ids_schema.load(request.get_json())
     except ValidationError as err:
         return jsonify({"error": err.messages}), 400
 
@@ -526,11 +598,31 @@ def generate_embedding():
     updated = generate_embedding_service(product_ids)
 
     if updated is None:
-        return jsonify({"error": "Some product IDs not found"}), 4
-    
+        return _ids_not_found(product_ids)
+
+    if request.args.get("encoding") == "float16":
+        updated = [
+            {"embedding": encode_embedding_float16(product["embedding"]), "dtype": "float16"}
+            for product in updated
+        ]
+
     return jsonify({"updated_products": updated}), 200
 
 #Similarity Search
+def _get_ef_search():
+    """
+    Read the optional `ef` query parameter of the similarity endpoints.
+    ---
+    Returns:
+        tuple: (ef_search, error) where ef_search is an int or None and error
+               is a 400 response when the value is outside pgvector's 1-1000.
+    """
+    ef_search = request.args.get("ef", type=int)
+    if ef_search is not None and not 1 <= ef_search <= 1000:
+        return None, (jsonify({"error": "'ef' must be between 1 and 1000"}), 400)
+    return ef_search, None
+
+
 def similarity_search_by_id(id):
     """
     Get similar products based on embeddings
@@ -551,6 +643,11 @@ def similarity_search_by_id(id):
         required: false
         default: 5
         description: Number of similar products to return
+      - name: ef
+        in: query
+        type: integer
+        required: false
+        description: HNSW candidate list size (1-1000); higher improves recall at the cost of latency
     responses:
       200:
         description: A list of similar products
@@ -577,12 +674,61 @@ def similarity_search_by_id(id):
               type: string
     """
     limit = request.args.get("limit", 5, type=int)
-    results = similarity_search_by_id_service(id, limit)
+    ef_search, error = _get_ef_search()
+    if error:
+        return error
+    results = similarity_search_by_id_service(id, limit, ef_search)
     if results is None:
         return jsonify({"error": "Product not found or missing embedding"}), 404
     return jsonify({"similar_products": results})
 
 
+def similarity_search_batch():
+    """
+    Get similar products for several products at once.
+    ---
+    tags:
+      - Products
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          properties:
+            product_ids:
+              type: array
+              items:
+                type: integer
+              example: [1, 2, 3]
+            limit:
+              type: integer
+              default: 5
+              description: Number of similar products to return per product
+            ef:
+              type: integer
+              description: HNSW candidate list size (1-1000); higher improves recall at the cost of latency
+          required:
+            - product_ids
+    responses:
+      200:
+        description: Similar products for each requested product, in request order
+      400:
+        description: Validation error
+      404:
+        description: Some products not found or missing embeddings
+    """
+    try:
+        data = similarity_batch_schema.load(request.get_json())
+    except ValidationError as err:
+        return jsonify(err.messages), 400
+
+    results = similarity_search_batch_service(data['product_ids'], data['limit'], data['ef'])
+    if results is None:
+        return jsonify({"error": "Some products not found or missing embedding"}), 404
+    return jsonify({"results": results}), 200
+
+
 def similarity_search_by_name():
     """
     Search for products similar to the given name using text embeddings.
@@ -602,6 +748,11 @@ def similarity_search_by_name():
         required: false
         default: 5
         description: Maximum number of similar products to return.
+      - name: ef
+        in: query
+        type: integer
+        required: false
+        description: HNSW candidate list size (1-1000); higher improves recall at the cost of latency.
     responses:
       200:
         description: A list of similar products found.
@@ -634,13 +785,18 @@ def similarity_search_by_name():
             error:
               type: string
     """
-    name = request.args.get("name")
+    # A whitespace-only name would embed as an empty string
+    name = (request.args.get("name") or "").strip()
     limit = request.args.get("limit", 5, type=int)
 
     if not name:
         return jsonify({"error": "Missing 'name' query parameter"}), 400
 
-    results = similarity_search_by_name_service(name, limit)
+    ef_search, error = _get_ef_search()
+    if error:
+        return error
+
+    results = similarity_search_by_name_service(name, limit, ef_search)
 
     if not results:
         return jsonify({"error": "Product not found or missing embedding"}), 404
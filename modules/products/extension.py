@@ -1,7 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_marshmallow import Marshmallow
 from flasgger import Swagger
+from flask_caching import Cache
 
 db = SQLAlchemy()
 ma = Marshmallow()
 swagger = Swagger()
+cache = Cache()
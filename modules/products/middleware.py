@@ -1,4 +1,4 @@
-from marshmallow import Schema, fields, validate
+from marshmallow import Schema, fields, post_load, validate
 
 class ProductSchema(Schema):
     """
@@ -53,6 +53,43 @@ class ProductSchema(Schema):
     arabic_name = fields.String(required=False)
     arabic_description = fields.String(required=False)
 
+    @post_load
+    def drop_generated_fields(self, data, **kwargs):
+        # in_stock is generated by Postgres from quantity; a client-supplied
+        # value is accepted for compatibility but never written
+        data.pop('in_stock', None)
+        return data
+
+
+class ProductUpdateItemSchema(ProductSchema):
+    """One entry of a bulk update: the product id plus any fields to change."""
+    id = fields.Int(required=True)
+
+
+# Every product field is optional per bulk-update item, as in a single PUT; only id is required
+PRODUCT_UPDATE_FIELDS = (
+    "name", "category", "description", "price", "quantity",
+    "in_stock", "embedding", "arabic_name", "arabic_description",
+)
+
+
+class BulkUpdateSchema(Schema):
+    products = fields.List(
+        fields.Nested(ProductUpdateItemSchema(partial=PRODUCT_UPDATE_FIELDS)),
+        required=True,
+    )
+
 
 class BatchIDsSchema(Schema):
-    product_ids = fields.List(fields.Int(), required=True)
\ No newline at end of file
+    product_ids = fields.List(fields.Int(), required=True)
+
+
+class SimilarityBatchSchema(BatchIDsSchema):
+    limit = fields.Int(load_default=5, validate=validate.Range(min=1, max=1000))
+    ef = fields.Int(load_default=None, validate=validate.Range(min=1, max=1000))
+
+
+# Stateless and safe to share; built once instead of on every batch request
+batch_ids_schema = BatchIDsSchema()
+bulk_update_schema = BulkUpdateSchema()
+similarity_batch_schema = SimilarityBatchSchema()
@@ -1,6 +1,7 @@
-from datetime import datetime
+import numpy as np
+from sqlalchemy import Computed, Index, column, func, table, text
 from .extension import db
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import HALFVEC
 
 class Products(db.Model):
     """
@@ -13,38 +14,120 @@ class Products(db.Model):
         price (Decimal): Price of the product with 2 decimal precision.
         quantity (int): Available quantity in stock.
         in_stock (bool): Indicates if the product is in stock (True if quantity > 0).
-        created_at (datetime): Timestamp when the product was created.
+                         Generated by Postgres from quantity; never written by the app.
+        created_at (datetime): Timezone-aware timestamp when the product was created, set by Postgres.
 
     Methods:
-        to_dict(): Returns a dictionary representation of the product, 
-                   suitable for JSON serialization.
+        to_dict(include_embedding=False): Returns a dictionary representation of the product, 
+                   suitable for JSON serialization. The embedding is omitted unless requested.
+        serialize(row, include_embedding=False): Same representation for a Core result row.
     """
     __tablename__ = 'products'
-    __table_args__ = {'schema': 'inventory'}
+    __table_args__ = (
+        # ANN index for the similarity searches; the operator class must match
+        # the distance operator they order by (<#> / inner product) or Postgres
+        # falls back to a sequential scan. Embeddings are stored unit-length,
+        # so inner product ranks exactly like cosine. DDL lives in migrations/.
+        Index(
+            'ix_products_embedding_hnsw',
+            'embedding',
+            postgresql_using='hnsw',
+            postgresql_with={'m': 16, 'ef_construction': 64},
+            postgresql_ops={'embedding': 'halfvec_ip_ops'},
+        ),
+        # First-pass index over the 256-d prefix: a quarter of the distance
+        # work per graph step; candidates are reranked on the full vector.
+        Index(
+            'ix_products_embedding_short_hnsw',
+            'embedding_short',
+            postgresql_using='hnsw',
+            postgresql_with={'m': 16, 'ef_construction': 64},
+            postgresql_ops={'embedding_short': 'halfvec_ip_ops'},
+        ),
+        # Covers the per-category aggregates, so they can be answered with an
+        # index-only scan instead of reading the heap.
+        Index(
+            'ix_products_category_price_quantity',
+            'category',
+            postgresql_include=['price', 'quantity'],
+        ),
+        # Partial index holding only out-of-stock rows; its predicate must
+        # match the out_of_stock_service filter for the planner to use it.
+        Index(
+            'ix_products_in_stock_false',
+            'id',
+            postgresql_where=text('NOT in_stock'),
+        ),
+        # Serves ORDER BY price DESC LIMIT n (most expensive products)
+        Index('ix_products_price_desc', text('price DESC')),
+        {'schema': 'inventory'},
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.String(), nullable=False)
     category = db.Column(db.String(100), nullable=True)
     price = db.Column(db.Numeric(10, 2), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
-    in_stock = db.Column(db.Boolean, nullable=False, default=True)
-    embedding = db.Column(Vector(1024))
-    created_at = db.Column(db.DateTime, default=datetime.now)
+    in_stock = db.Column(db.Boolean, Computed('quantity > 0', persisted=True))
+    # Half precision (pgvector halfvec): 2 KB per row instead of 4 KB
+    embedding = db.Column(HALFVEC(1024))
+    # First 256 dimensions of the embedding, renormalized (Titan v2 embeddings
+    # are Matryoshka-style, so the prefix is a usable coarse embedding)
+    embedding_short = db.Column(HALFVEC(256))
+    created_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False)
     arabic_name = db.Column(db.String(100))
     arabic_description = db.Column(db.String())
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'category': self.category,
-            'description': self.description,
-            'price': float(self.price),
-            'quantity': self.quantity,
-            'in_stock': self.in_stock,
-            'embedding': self.embedding.tolist() if self.embedding is not None else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'arabic_name': self.arabic_name,
-            'arabic_description': self.arabic_description
+    def to_dict(self, include_embedding=False):
+        return self.serialize(self, include_embedding)
+
+    @staticmethod
+    def serialize(row, include_embedding=False):
+        """
+        Build the JSON representation from anything exposing the product
+        columns as attributes: a Products instance or a Core `Row`, which
+        lets list endpoints skip ORM object hydration. The 1024-d embedding
+        is only included on request; rows selected with LIST_COLUMNS do not
+        carry it at all.
+        """
+        data = {
+            'id': row.id,
+            'name': row.name,
+            'category': row.category,
+            'description': row.description,
+            'price': float(row.price),
+            'quantity': row.quantity,
+            'in_stock': row.in_stock,
+            'created_at': row.created_at.isoformat() if row.created_at else None,
+            'arabic_name': row.arabic_name,
+            'arabic_description': row.arabic_description
         }
+        if include_embedding:
+            # Kept as an ndarray for orjson to encode directly rather than
+            # boxing 1024 Python floats; halfvec arrives big-endian, which
+            # orjson rejects, so it is converted to native float16 first.
+            data['embedding'] = (
+                row.embedding.to_numpy().astype(np.float16) if row.embedding is not None else None
+            )
+        return data
+
+
+# Materialized per-category aggregates (migrations/009), read by the analytics
+# services. A lightweight table() rather than a model: it is a view, so it must
+# never be part of the metadata that gets created or migrated as a table.
+category_stats = table(
+    'category_stats',
+    column('category'),
+    column('product_count'),
+    column('total_price'),
+    column('total_value'),
+    schema='inventory',
+)
+
+
+# Every column except the embeddings, for list endpoints that never return
+# vectors; selecting them keeps the embeddings off the wire entirely.
+LIST_COLUMNS = tuple(
+    column for column in Products.__table__.c if column.name not in ('embedding', 'embedding_short')
+)
 
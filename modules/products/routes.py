@@ -7,10 +7,13 @@ from .controller import(
     get_product,
     health_status,
     similarity_search_by_id,
+    similarity_search_batch,
     similarity_search_by_name,
     translate_name_description,
     update_product,
     delete_product,
+    update_products_bulk,
+    delete_products_bulk,
     total_value,
     total_nb_of_products_category,
     avg_product_price,
@@ -131,6 +134,12 @@ def get_product_route(id):
         type: integer
         required: true
         description: The ID of the product to retrieve
+      - name: with_embedding
+        in: query
+        type: boolean
+        required: false
+        default: false
+        description: Include the embedding vector in the response
     responses:
       200:
         description: Product retrieved successfully
@@ -263,6 +272,98 @@ def delete_product_route(id):
     return delete_product(id)
 
 
+# Bulk UPDATE Products
+@products_bp.route('/products/bulk', methods=['PUT'])
+def update_products_bulk_route():
+    """
+    Update several products in one request.
+    ---
+    tags:
+      - Products
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          properties:
+            products:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                    example: 1
+                  quantity:
+                    type: integer
+                    example: 8
+                  price:
+                    type: number
+                    format: float
+                    example: 1999.99
+                required:
+                  - id
+          required:
+            - products
+    responses:
+      200:
+        description: Products updated successfully
+        schema:
+          type: object
+          properties:
+            updated_products:
+              type: array
+              items:
+                type: object
+      400:
+        description: Validation error
+      404:
+        description: Some product IDs not found
+    """
+    return update_products_bulk()
+
+
+# Bulk DELETE Products
+@products_bp.route('/products/bulk', methods=['DELETE'])
+def delete_products_bulk_route():
+    """
+    Delete several products in one request.
+    ---
+    tags:
+      - Products
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          properties:
+            product_ids:
+              type: array
+              items:
+                type: integer
+              example: [1, 2, 3]
+          required:
+            - product_ids
+    responses:
+      200:
+        description: Products deleted successfully
+        schema:
+          type: object
+          properties:
+            deleted_products:
+              type: array
+              items:
+                type: object
+      400:
+        description: Validation error
+      404:
+        description: Some product IDs not found
+    """
+    return delete_products_bulk()
+
+
 # Total Inventory Value
 @products_bp.route('/products/total_value', methods=['GET'])
 def total_value_route():
@@ -593,6 +694,12 @@ def generate_embedding_route():
               description: List of product IDs to generate embeddings for
           required:
             - product_ids
+      - name: encoding
+        in: query
+        type: string
+        required: false
+        enum: [float16]
+        description: Return each embedding as base64-encoded little-endian float16 bytes instead of a list of numbers
     responses:
       200:
         description: Successfully generated and stored embeddings
@@ -608,7 +715,11 @@ def generate_embedding_route():
                     type: array
                     items:
                       type: number
-                    description: The vector embedding for the product name
+                    description: The vector embedding for the product name (a base64 string when encoding=float16)
+                  dtype:
+                    type: string
+                    example: float16
+                    description: Only present when encoding=float16
       400:
         description: Validation error or bad request
       404:
@@ -640,6 +751,11 @@ def similarity_search_by_id_route(id):
         required: false
         default: 5
         description: Maximum number of similar products to return
+      - name: ef
+        in: query
+        type: integer
+        required: false
+        description: HNSW candidate list size (1-1000); higher improves recall at the cost of latency
     responses:
       200:
         description: List of similar products
@@ -665,6 +781,70 @@ def similarity_search_by_id_route(id):
     """
     return similarity_search_by_id(id)
 
+@products_bp.route("/products/similarity_batch", methods=["POST"])
+def similarity_search_batch_route():
+    """
+    Find similar products for several products in one request.
+
+    ---
+    tags:
+      - Products
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          properties:
+            product_ids:
+              type: array
+              items:
+                type: integer
+              example: [1, 2, 3]
+              description: IDs of the products to find similar products for
+            limit:
+              type: integer
+              default: 5
+              description: Maximum number of similar products to return per product (1-1000)
+            ef:
+              type: integer
+              description: HNSW candidate list size (1-1000); higher improves recall at the cost of latency
+          required:
+            - product_ids
+    responses:
+      200:
+        description: Similar products for each requested product, in request order
+        schema:
+          type: object
+          properties:
+            results:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                  similar_products:
+                    type: array
+                    items:
+                      type: object
+                      properties:
+                        id:
+                          type: integer
+                        name:
+                          type: string
+      400:
+        description: Validation error
+      404:
+        description: Some products not found or missing embeddings
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+    """
+    return similarity_search_batch()
+
 @products_bp.route("/products/similarity_by_name", methods=['GET'])
 def similarity_search_by_name_route():
     """
@@ -689,6 +869,12 @@ def similarity_search_by_name_route():
             type: integer
             default: 5
           description: Number of similar products to return.
+        - name: ef
+          in: query
+          required: false
+          schema:
+            type: integer
+          description: HNSW candidate list size (1-1000); higher improves recall at the cost of latency.
       responses:
         200:
           description: List of similar products.
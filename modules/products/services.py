@@ -1,9 +1,555 @@
-from sqlalchemy import func, or_, text
-from aws_translate_service.translate import translate
-from bedrock.embedding_generator import invoke_bedrock_embedding
-from modules.products.model import Products
-from modules.products.extension import db
-from bedrock.category_classifier import invoke_bedrock_category
+import base64
+import io
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from flask import current_app
+from pgvector.sqlalchemy import HALFVEC
+from sqlalchemy import Float, Text, bindparam, cast, delete, func, insert, lambda_stmt, select, text, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import defer
+from aws_translate_service.translate import translate_many
+from config import HNSW_EF_SEARCH
+from bedrock.embedding_generator import invoke_bedrock_embedding, invoke_bedrock_embeddings_batch
+from modules.products.model import LIST_COLUMNS, Products, category_stats
+from modules.products.extension import cache, db
+from bedrock.category_classifier import cached_category, invoke_bedrock_category, invoke_bedrock_category_batch
+
+
+def _invalidate_read_caches():
+    """Drop cached analytics and similarity results after any write to the products table."""
+    with _similar_query_lock:
+        _similar_query_cache.clear()
+    for service in (
+        min_max_price_service,
+        out_of_stock_service,
+        most_expensive_products_service,
+    ):
+        cache.delete_memoized(service)
+    _schedule_category_stats_refresh()
+
+
+# Writes within this many seconds share one refresh of inventory.category_stats;
+# until it runs, the category aggregates can trail the table by that long.
+CATEGORY_STATS_REFRESH_DELAY = 1.0
+
+_category_stats_timer = None
+_category_stats_lock = threading.Lock()
+
+
+def _schedule_category_stats_refresh():
+    """Refresh the category_stats view in the background shortly after a write."""
+    global _category_stats_timer
+    app = current_app._get_current_object()
+    with _category_stats_lock:
+        if _category_stats_timer is not None:
+            return
+        _category_stats_timer = threading.Timer(
+            CATEGORY_STATS_REFRESH_DELAY, _refresh_category_stats, args=(app,)
+        )
+        _category_stats_timer.daemon = True
+        _category_stats_timer.start()
+
+
+def _refresh_category_stats(app):
+    """
+    Recompute the view, then drop the analytics results cached from it.
+    ---
+    The view lives in Postgres, so one worker's refresh serves every worker;
+    the others pick it up once their memoized results expire.
+    """
+    global _category_stats_timer
+    with _category_stats_lock:
+        # Writes from here on schedule another refresh rather than being missed
+        _category_stats_timer = None
+    with app.app_context():
+        try:
+            db.session.execute(text("SET LOCAL statement_timeout = 0"))
+            db.session.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY inventory.category_stats"))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"ERROR: Can't refresh inventory.category_stats. Reason: {e}")
+        for service in (
+            total_value_service,
+            avg_product_price_service,
+            total_nb_of_products_category_service,
+            value_per_category_service,
+        ):
+            cache.delete_memoized(service)
+
+
+# Dimensions kept in embedding_short, and how many first-pass candidates
+# from its index are reranked with the full vector.
+SHORT_EMBEDDING_DIMENSIONS = 256
+RERANK_CANDIDATES = 50
+
+# Embeddings are only needed by the similarity searches; everything else
+# loads products without them.
+_DEFER_EMBEDDINGS = (defer(Products.embedding), defer(Products.embedding_short))
+
+# Built once at import: the bound vectors and limits are the only things that
+# change per request, so SQLAlchemy's compiled cache serves every call. The
+# CTE walks the 256-d HNSW index for candidates; only those are reranked on
+# the full 1024-d vector.
+_SHORT_CANDIDATES = (
+    select(Products.id)
+    .where(Products.embedding_short.isnot(None))
+    .order_by(Products.embedding_short.max_inner_product(
+        bindparam("q_short", type_=HALFVEC(SHORT_EMBEDDING_DIMENSIONS))
+    ))
+    .limit(bindparam("candidates"))
+    .cte("candidates")
+)
+_SIMILAR_BY_EMBEDDING = (
+    select(Products.id, Products.name)
+    .join(_SHORT_CANDIDATES, Products.id == _SHORT_CANDIDATES.c.id)
+    .order_by(Products.embedding.max_inner_product(bindparam("q", type_=HALFVEC(1024))))
+    .limit(bindparam("k"))
+)
+# similarity_by_id: the target's vector never leaves Postgres. As a scalar
+# subquery it runs once (an InitPlan) and acts as a constant to the HNSW index
+# scan, which a join against it would not; a missing target or embedding
+# makes the one-time IS NOT NULL filter return no rows.
+_TARGET_EMBEDDING = (
+    select(Products.embedding).where(Products.id == bindparam("target_id")).scalar_subquery()
+)
+_SIMILAR_TO_PRODUCT = (
+    select(Products.id, Products.name)
+    .where(
+        _TARGET_EMBEDDING.isnot(None),
+        Products.id != bindparam("target_id"),
+        Products.embedding.isnot(None),
+    )
+    .order_by(Products.embedding.max_inner_product(_TARGET_EMBEDDING))
+    .limit(bindparam("k"))
+)
+
+# similarity_by_name results for recent queries. A new query whose embedding
+# has cosine similarity >= SIMILAR_QUERY_THRESHOLD with a cached one reuses
+# its results, skipping the vector search. Entries live for at most
+# SIMILAR_QUERY_TTL seconds (the analytics cache timeout), which bounds
+# staleness from writes handled by other workers; this worker's own writes
+# clear the cache.
+SIMILAR_QUERY_CACHE_SIZE = 1000
+SIMILAR_QUERY_THRESHOLD = 0.97
+SIMILAR_QUERY_TTL = 30
+_similar_query_cache = OrderedDict()  # (name, limit, ef) -> (unit vector, expires_at, results)
+_similar_query_lock = threading.Lock()
+
+
+def _embed_query(normalized_name):
+    """Embedding of a search query as a unit float32 vector (Bedrock answers are cached per text)."""
+    embedding = np.asarray(invoke_bedrock_embedding(normalized_name), dtype=np.float32)
+    return embedding / np.linalg.norm(embedding)
+
+
+def _lookup_similar_query(key, query_vector):
+    now = time.monotonic()
+    with _similar_query_lock:
+        for expired in [k for k, entry in _similar_query_cache.items() if entry[1] <= now]:
+            del _similar_query_cache[expired]
+
+        entry = _similar_query_cache.get(key)
+        if entry is not None:
+            _similar_query_cache.move_to_end(key)
+            return entry[2]
+
+        for cached_key, (vector, _, results) in _similar_query_cache.items():
+            if cached_key[1:] == key[1:] and float(vector @ query_vector) >= SIMILAR_QUERY_THRESHOLD:
+                return results
+    return None
+
+
+def _store_similar_query(key, query_vector, results):
+    with _similar_query_lock:
+        _similar_query_cache[key] = (query_vector, time.monotonic() + SIMILAR_QUERY_TTL, results)
+        _similar_query_cache.move_to_end(key)
+        while len(_similar_query_cache) > SIMILAR_QUERY_CACHE_SIZE:
+            _similar_query_cache.popitem(last=False)
+
+
+# Top `limit` neighbours for many products in one statement: the LATERAL
+# subquery runs once per target row and can walk the HNSW index each time,
+# and the target vectors never leave Postgres. LEFT JOIN keeps targets that
+# have no neighbours, so a missing target means a missing product/embedding.
+_SIMILAR_BATCH = text("""
+    SELECT q.id AS query_id, s.id, s.name
+    FROM inventory.products q
+    LEFT JOIN LATERAL (
+        SELECT p.id, p.name, p.embedding <#> q.embedding AS distance
+        FROM inventory.products p
+        WHERE p.id != q.id AND p.embedding IS NOT NULL
+        ORDER BY distance
+        LIMIT :limit
+    ) s ON true
+    WHERE q.id IN :ids AND q.embedding IS NOT NULL
+    ORDER BY q.id, s.distance
+""").bindparams(bindparam("ids", expanding=True))
+
+
+# Catalogs up to SIMILARITY_MATRIX_MAX_ROWS embedded products keep a copy of
+# every embedding in memory (float32, unit-normalized: ~200 MB at the cap), so
+# similarity searches are an exact matrix-vector product instead of a
+# database round-trip; larger catalogs use the HNSW index. The matrix is
+# loaded by a single background thread (searches use Postgres until it is
+# ready), updated copy-on-write when this worker writes embeddings, and reloaded
+# in the background every SIMILARITY_MATRIX_TTL seconds to pick up writes
+# from other workers. Only ids are kept: names are read per search, so they
+# are never stale.
+SIMILARITY_MATRIX_MAX_ROWS = 50_000
+SIMILARITY_MATRIX_TTL = 300
+# state: {"ids", "rows", "matrix", "valid", "size", "expires_at"}; "matrix"
+# is None when the catalog is too large
+_similarity_matrix = None
+# Changes made while a load is running (None when no load is running); the
+# load's snapshot may predate them, so they are replayed onto it
+_similarity_matrix_pending = None
+_similarity_matrix_lock = threading.Lock()
+
+
+def _set_ef_search(ef_search, rows):
+    """
+    Size hnsw.ef_search for the current transaction.
+    ---
+    Larger values widen the HNSW candidate list: better recall, slower
+    searches. An HNSW index scan returns at most ef_search rows, so it is
+    raised to the number of rows the search needs; otherwise connections
+    keep config.HNSW_EF_SEARCH and no statement is sent. `SET` takes no bind
+    parameters, so the validated integer is inlined.
+
+    Args:
+        ef_search (int or None): The caller's override.
+        rows (int): Rows the index scan has to return (pgvector caps it at 1000).
+    """
+    ef_search = max(ef_search or HNSW_EF_SEARCH, min(rows, 1000))
+    if ef_search != HNSW_EF_SEARCH:
+        db.session.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+
+
+def _load_similarity_matrix():
+    expires_at = time.monotonic() + SIMILARITY_MATRIX_TTL
+    has_embedding = Products.embedding.isnot(None)
+
+    count = db.session.execute(select(func.count()).select_from(Products).where(has_embedding)).scalar()
+    if count > SIMILARITY_MATRIX_MAX_ROWS:
+        return {"matrix": None, "expires_at": expires_at}
+
+    rows = db.session.execute(select(Products.id, Products.embedding).where(has_embedding)).all()
+    # Spare rows let new embeddings be appended without copying the matrix
+    capacity = min(SIMILARITY_MATRIX_MAX_ROWS, len(rows) + max(1024, len(rows) // 4))
+    ids = np.zeros(capacity, dtype=np.int64)
+    matrix = np.zeros((capacity, 1024), dtype=np.float32)
+    for i, row in enumerate(rows):
+        ids[i] = row.id
+        matrix[i] = row.embedding.to_numpy()
+    norms = np.linalg.norm(matrix[:len(rows)], axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    matrix[:len(rows)] /= norms
+    valid = np.zeros(capacity, dtype=bool)
+    valid[:len(rows)] = True
+
+    return {
+        "ids": ids,
+        "rows": {row.id: i for i, row in enumerate(rows)},
+        "matrix": matrix,
+        "valid": valid,
+        "size": len(rows),
+        "expires_at": expires_at,
+    }
+
+
+def _apply_similarity_changes(state, changes):
+    """
+    Return a loaded matrix state with new, changed or removed embeddings applied.
+    ---
+    Called with the lock held. Searches use whichever state they picked up
+    without locking, so nothing they can read is modified: `rows` and `valid`
+    are copied, and every new vector (changed ones included) is written to a
+    spare row past the old state's `size`. Superseded and removed rows only
+    lose their `valid` flag; they are dropped when the spare rows run out and
+    the live rows are compacted into new arrays.
+
+    Args:
+        state (dict): The matrix state.
+        changes (dict): product id -> unit float32 embedding, or None if the
+                        product was deleted or lost its embedding.
+
+    Returns:
+        dict: The state to publish, which is a too-large marker if the live
+              rows would pass SIMILARITY_MATRIX_MAX_ROWS.
+    """
+    if state["matrix"] is None:
+        return state
+    ids, matrix, size = state["ids"], state["matrix"], state["size"]
+    rows = dict(state["rows"])
+    valid = state["valid"].copy()
+    for product_id, vector in changes.items():
+        row = rows.pop(product_id, None)
+        if row is not None:
+            valid[row] = False
+        if vector is None:
+            continue
+        if size == len(ids):
+            live = np.flatnonzero(valid[:size])
+            if len(live) >= SIMILARITY_MATRIX_MAX_ROWS:
+                return {"matrix": None, "expires_at": state["expires_at"]}
+            capacity = min(SIMILARITY_MATRIX_MAX_ROWS, len(live) + max(1024, len(live) // 4))
+            size = len(live)
+            compacted_ids = np.zeros(capacity, dtype=np.int64)
+            compacted_ids[:size] = ids[live]
+            compacted = np.zeros((capacity, 1024), dtype=np.float32)
+            compacted[:size] = matrix[live]
+            ids, matrix = compacted_ids, compacted
+            rows = {int(product): i for i, product in enumerate(ids[:size])}
+            valid = np.zeros(capacity, dtype=bool)
+            valid[:size] = True
+        # Stored as halfvec, so round the same way to rank like the loaded rows
+        stored = np.asarray(vector, dtype=np.float16).astype(np.float32)
+        matrix[size] = stored / (np.linalg.norm(stored) or 1)
+        ids[size] = product_id
+        valid[size] = True
+        rows[product_id] = size
+        size += 1
+    return {
+        "ids": ids,
+        "rows": rows,
+        "matrix": matrix,
+        "valid": valid,
+        "size": size,
+        "expires_at": state["expires_at"],
+    }
+
+
+def _update_similarity_matrix(changes):
+    """
+    Record committed embedding writes in this worker's in-memory matrix.
+    ---
+    Args:
+        changes (dict): product id -> unit embedding, or None when removed.
+    """
+    global _similarity_matrix
+    with _similarity_matrix_lock:
+        if _similarity_matrix_pending is not None:
+            _similarity_matrix_pending.append(changes)
+        if _similarity_matrix is not None:
+            _similarity_matrix = _apply_similarity_changes(_similarity_matrix, changes)
+
+
+def _load_similarity_matrix_in_background(app):
+    """Load the matrix, replay writes made meanwhile, publish it and end the load."""
+    global _similarity_matrix, _similarity_matrix_pending
+    try:
+        with app.app_context():
+            state = _load_similarity_matrix()
+    except Exception as e:
+        print(f"ERROR: Can't load the similarity matrix. Reason: {e}")
+        state = None
+    with _similarity_matrix_lock:
+        if state is not None:
+            for changes in _similarity_matrix_pending:
+                state = _apply_similarity_changes(state, changes)
+            _similarity_matrix = state
+        _similarity_matrix_pending = None
+
+
+def _get_similarity_matrix():
+    """
+    Return the in-memory embedding matrix, starting a background load if it is missing or expired.
+    ---
+    Never waits for a load: an expired matrix is still served while the new
+    one loads, and None sends the search to Postgres.
+
+    Returns:
+        dict or None: The matrix state, or None when it is not loaded yet or
+                      the catalog is too large.
+    """
+    global _similarity_matrix_pending
+    state = _similarity_matrix
+    if state is None or state["expires_at"] <= time.monotonic():
+        with _similarity_matrix_lock:
+            if _similarity_matrix_pending is None:
+                _similarity_matrix_pending = []
+                threading.Thread(
+                    target=_load_similarity_matrix_in_background,
+                    args=(current_app._get_current_object(),),
+                    daemon=True,
+                ).start()
+    return state if state is not None and state["matrix"] is not None else None
+
+
+def _matrix_top_ids(state, query_vector, limit, exclude_row=None):
+    """Ids of the top `limit` products by cosine similarity to a unit query vector."""
+    size = state["size"]
+    scores = state["matrix"][:size] @ query_vector
+    scores[~state["valid"][:size]] = -np.inf
+    if exclude_row is not None:
+        scores[exclude_row] = -np.inf
+
+    k = min(limit, size)
+    if k <= 0:
+        return []
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return [int(state["ids"][i]) for i in top if scores[i] != -np.inf]
+
+
+def _product_names(product_ids):
+    """Current names for the given ids; products deleted meanwhile are absent."""
+    return dict(db.session.execute(
+        select(Products.id, Products.name).where(Products.id.in_(product_ids))
+    ).all())
+
+
+def _search_similarity_matrix(state, query_vector, limit, exclude_row=None):
+    """Top `limit` products by cosine similarity to a unit query vector, as id/name dicts."""
+    top_ids = _matrix_top_ids(state, query_vector, limit, exclude_row)
+    names = _product_names(top_ids)
+    return [{"id": product_id, "name": names[product_id]} for product_id in top_ids if product_id in names]
+
+
+# Batches at least this large are written with COPY into a staging table;
+# smaller ones use the ORM bulk UPDATE, which avoids the temp-table DDL.
+COPY_EMBEDDINGS_MIN_ROWS = 500
+
+
+def _vector_text(vector):
+    """pgvector text form '[x,y,...]' of a float ndarray.
+
+    One %-format over the whole list instead of str() per numpy scalar;
+    7 significant digits is well beyond what halfvec keeps.
+    """
+    return f"[{('%.7g,' * len(vector) % tuple(vector.tolist()))[:-1]}]"
+
+
+def _copy_embeddings(values):
+    """
+    Write embeddings with COPY into a temporary table and one UPDATE ... FROM.
+    ---
+    Runs on the session's connection, inside its transaction; the staging
+    table is dropped at commit. Vectors travel in pgvector's text format, so
+    no per-row statement is parsed or planned.
+
+    Args:
+        values (list[dict]): Rows with 'id', 'embedding' and 'embedding_short'.
+    """
+    buffer = io.StringIO()
+    for row in values:
+        buffer.write(
+            f"{row['id']}\t{_vector_text(row['embedding'])}\t{_vector_text(row['embedding_short'])}\n"
+        )
+    buffer.seek(0)
+
+    cursor = db.session.connection().connection.cursor()
+    try:
+        # A large copy can outlast the pool's statement_timeout; lift it for this transaction only
+        cursor.execute("SET LOCAL statement_timeout = 0")
+        cursor.execute(
+            "CREATE TEMP TABLE _product_embeddings "
+            "(id integer PRIMARY KEY, embedding halfvec(1024), embedding_short halfvec(256)) ON COMMIT DROP"
+        )
+        cursor.copy_expert("COPY _product_embeddings (id, embedding, embedding_short) FROM STDIN", buffer)
+        cursor.execute("""
+            UPDATE inventory.products p
+            SET embedding = s.embedding, embedding_short = s.embedding_short
+            FROM _product_embeddings s
+            WHERE p.id = s.id
+        """)
+    finally:
+        cursor.close()
+
+
+def _normalize_embedding(embedding):
+    """Scale an embedding to a float32 unit vector before it is stored.
+
+    Searches rank by negative inner product (<#>), which orders results like
+    cosine distance only for unit vectors, and skips the per-comparison norms.
+    """
+    vector = np.asarray(embedding, dtype=np.float32)
+    return vector / (np.linalg.norm(vector) + 1e-12)
+
+
+def _embedding_values(embedding):
+    """Column values for a new embedding: the unit vector and its renormalized 256-d prefix."""
+    if embedding is None:
+        return {'embedding': None, 'embedding_short': None}
+    embedding = _normalize_embedding(embedding)
+    return {
+        'embedding': embedding,
+        'embedding_short': _normalize_embedding(embedding[:SHORT_EMBEDDING_DIMENSIONS]),
+    }
+
+
+# List endpoints stream rows through a server-side cursor in pages of this
+# size, so psycopg2 never buffers the whole table next to the serialized list.
+LIST_PAGE_SIZE = 1000
+
+
+def _release_connection():
+    """
+    End the current read-only transaction before a slow AWS call.
+    ---
+    The batch services read Core rows (no ORM state to expire), then wait
+    seconds on Bedrock/Translate. Committing here returns the connection to
+    the pool instead of holding it idle-in-transaction for that wait; the
+    write that follows checks out a connection again.
+    """
+    db.session.commit()
+
+
+def encode_embedding_float16(embedding):
+    """
+    Pack an embedding for transport as base64-encoded little-endian float16.
+    ---
+    Titan embeddings are unit-normalized, so half precision keeps similarity
+    practically unchanged while cutting the payload to a fraction of the
+    JSON number list.
+
+    Args:
+        embedding (list[float]): The embedding vector.
+
+    Returns:
+        str: Base64 encoding of the float16 bytes.
+    """
+    return base64.b64encode(np.asarray(embedding, dtype="<f2").tobytes()).decode("ascii")
+
+# Bedrock calls taken off the request path (category inference for new
+# products). Threads start lazily, so none exist before gunicorn forks.
+_background_tasks = ThreadPoolExecutor(max_workers=4, thread_name_prefix="products-bg")
+
+
+def _classify_in_background(app, product_id, product_name):
+    """
+    Infer a new product's category and store it, unless one was set meanwhile.
+    ---
+    Args:
+        app (Flask): The application, for a context outside the request.
+        product_id (int): The product created without a category.
+        product_name (str): The name to classify.
+    """
+    # Nothing reads the future, so failures are logged here or not at all
+    with app.app_context():
+        try:
+            category = invoke_bedrock_category(product_name)
+            if category is None:
+                return
+            result = db.session.execute(
+                update(Products)
+                .where(Products.id == product_id, Products.category.is_(None))
+                .values(category=category)
+            )
+            db.session.commit()
+            if result.rowcount:
+                _invalidate_read_caches()
+        except Exception as e:
+            db.session.rollback()
+            print(f"ERROR: Can't classify product {product_id} in the background. Reason: {e}")
+        finally:
+            db.session.remove()
+
 #CRUD
 
 #CREATE product
@@ -35,7 +581,9 @@ def add_product_service(data):
               example: "Electronics"
     responses:
       201:
-        description: Product created successfully
+        description: |
+          Product created successfully. Without a category, it is inferred
+          from the name in the background; category is null until then.
         schema:
           type: object
           properties:
@@ -60,19 +608,31 @@ def add_product_service(data):
       400:
         description: Validation error
     """
+    # Names classified before are answered from the cache; anything else is
+    # left NULL and classified after the response instead of blocking it
+    classify_later = False
     if not data.get("category"):
         product_name = data.get("name")
         if product_name:
-            category = invoke_bedrock_category(product_name)
-            data["category"] = category
+            data["category"] = cached_category(product_name)
+            classify_later = data["category"] is None
         else:
             data["category"] = "Uncategorized"
 
-    new_product = Products(**data)
-    new_product.in_stock = new_product.quantity > 0
-    db.session.add(new_product)
+    if 'embedding' in data:
+        data.update(_embedding_values(data['embedding']))
+    # INSERT ... RETURNING hands back the generated id, in_stock and
+    # created_at with the insert itself; no refresh SELECT after commit
+    row = db.session.execute(insert(Products).values(**data).returning(*LIST_COLUMNS)).one()
     db.session.commit()
-    return new_product
+    _invalidate_read_caches()
+    if data.get('embedding') is not None:
+        _update_similarity_matrix({row.id: data['embedding']})
+    if classify_later:
+        _background_tasks.submit(
+            _classify_in_background, current_app._get_current_object(), row.id, row.name
+        )
+    return Products.serialize(row)
 
 
 #READ
@@ -111,11 +671,18 @@ def get_products_service():
                 type: boolean
                 example: true
     """
-    return Products.query.all()
+    # Core rows avoid building an ORM object (and identity-map entry) per product
+    # lambda_stmt statements (here and in the analytics services below) are
+    # built once and cached with their cache key, skipping per-request construction
+    rows = db.session.execute(
+        lambda_stmt(lambda: select(*LIST_COLUMNS)),
+        execution_options={"yield_per": LIST_PAGE_SIZE},
+    )
+    return [Products.serialize(row) for row in rows]
 
 
 #particular product
-def get_product_service(id):
+def get_product_service(id, include_embedding=False):
     """
     Retrieve a single product by its ID.
     ---
@@ -127,6 +694,11 @@ def get_product_service(id):
         type: integer
         required: true
         description: The ID of the product to retrieve
+      - name: include_embedding
+        type: boolean
+        required: false
+        default: false
+        description: Also load the embedding column (skipped by default)
     responses:
       200:
         description: Product retrieved successfully
@@ -155,10 +727,10 @@ def get_product_service(id):
       404:
         description: Product not found
     """
-    product = Products.query.get(id)
-    if not product:
-        return None
-    return product
+    query = Products.query
+    if not include_embedding:
+        query = query.options(*_DEFER_EMBEDDINGS)
+    return query.get(id)
 
 
 #UPDATE product
@@ -171,21 +743,27 @@ def update_product_service(id, data):
         data (dict): A dictionary containing the product attributes to update.
 
     Returns:
-        Products or None: The updated product instance if found; otherwise, None.
+        dict or None: The updated product if found; otherwise, None.
     """
-    product = Products.query.get(id)
-    if not product:
-        return None
-    
-    for key, value in data.items():
-        setattr(product, key, value)
+    if not data:
+        row = db.session.execute(select(*LIST_COLUMNS).where(Products.id == id)).first()
+        return Products.serialize(row) if row else None
 
-    if 'quantity' in data:
-        product.in_stock = product.quantity > 0
+    if 'embedding' in data:
+        data.update(_embedding_values(data['embedding']))
+    # One UPDATE ... RETURNING instead of get, flush and a refresh after commit
+    row = db.session.execute(
+        update(Products).where(Products.id == id).values(**data).returning(*LIST_COLUMNS)
+    ).first()
+    if row is None:
+        return None
 
     db.session.commit()
+    _invalidate_read_caches()
+    if 'embedding' in data:
+        _update_similarity_matrix({id: data['embedding']})
 
-    return product
+    return Products.serialize(row)
 
 
 #DELETE product
@@ -197,20 +775,144 @@ def delete_product_service(id):
         id (int): The unique identifier of the product to delete.
 
     Returns:
-        Products or None: The deleted product instance if found; otherwise, None.
+        dict or None: The deleted product if found; otherwise, None.
     """
-    product = Products.query.get(id)
-    if not product:
+    row = db.session.execute(
+        delete(Products).where(Products.id == id).returning(*LIST_COLUMNS)
+    ).first()
+    if row is None:
         return None
-    db.session.delete(product)
     db.session.commit()
+    _invalidate_read_caches()
+    _update_similarity_matrix({id: None})
+
+    return Products.serialize(row)
+
+
+def missing_product_ids_service(product_ids):
+    """
+    Find which of the requested product ids do not exist.
+    ---
+    Only called once a batch service has already reported missing products,
+    so the successful path never pays for the extra id lookup.
+
+    Args:
+        product_ids (list of int): The ids a batch request referred to.
+
+    Returns:
+        list of int: The ids that match no product, sorted.
+    """
+    found = set(db.session.execute(
+        select(Products.id).where(Products.id.in_(product_ids))
+    ).scalars())
+    return sorted(set(product_ids) - found)
+
+
+#Bulk UPDATE products
+def update_products_bulk_service(items):
+    """
+    Update several products in one statement.
+    ---
+    Args:
+        items (list of dict): Each dict holds a product `id` and the attributes to update.
 
-    return product
+    Returns:
+        list of dict or None: The updated products, or None (nothing written)
+        if any id does not exist.
+    """
+    product_ids = [item['id'] for item in items]
+    found = db.session.execute(
+        select(func.count()).where(Products.id.in_(product_ids))
+    ).scalar()
+    if found != len(set(product_ids)):
+        return None
+
+    embedding_changes = {}
+    for item in items:
+        if 'embedding' in item:
+            item.update(_embedding_values(item['embedding']))
+            embedding_changes[item['id']] = item['embedding']
+
+    # ORM bulk UPDATE by primary key: one executemany instead of a get + flush per product
+    db.session.execute(update(Products), items)
+    rows = db.session.execute(select(*LIST_COLUMNS).where(Products.id.in_(product_ids)))
+    updated_products = [Products.serialize(row) for row in rows]
+
+    db.session.commit()
+    _invalidate_read_caches()
+    if embedding_changes:
+        _update_similarity_matrix(embedding_changes)
+    return updated_products
+
+
+#Bulk DELETE products
+def delete_products_bulk_service(product_ids):
+    """
+    Delete several products in one statement.
+    ---
+    Args:
+        product_ids (list of int): The ids of the products to delete.
+
+    Returns:
+        list of dict or None: The deleted products, or None (nothing deleted)
+        if any id does not exist.
+    """
+    # DELETE ... RETURNING removes and reports the rows in a single round-trip
+    rows = db.session.execute(
+        delete(Products).where(Products.id.in_(product_ids)).returning(*LIST_COLUMNS)
+    ).all()
+    if len(rows) != len(set(product_ids)):
+        db.session.rollback()
+        return None
+    deleted_products = [Products.serialize(row) for row in rows]
+
+    db.session.commit()
+    _invalidate_read_caches()
+    _update_similarity_matrix({row.id: None for row in rows})
+    return deleted_products
 
 
 #Additional calls
 
+def _product_json(columns):
+    """json_build_object() matching Products.serialize() for the given column collection."""
+    return func.json_build_object(
+        'id', columns.id,
+        'name', columns.name,
+        'category', columns.category,
+        'description', columns.description,
+        'price', cast(columns.price, Float),
+        'quantity', columns.quantity,
+        'in_stock', columns.in_stock,
+        'created_at', columns.created_at,
+        'arabic_name', columns.arabic_name,
+        'arabic_description', columns.arabic_description,
+    )
+
+
+def _json_array(aggregate):
+    """The aggregated rows as JSON text; an empty result is '[]' rather than NULL."""
+    return func.coalesce(cast(aggregate, Text), '[]')
+
+
+# Read-only list analytics are built as a single JSON document by Postgres
+# and returned verbatim: no Row objects, dicts or re-encoding in Python.
+_top_priced = select(*LIST_COLUMNS).order_by(Products.price.desc()).limit(5).subquery()
+_OUT_OF_STOCK_JSON = select(
+    _json_array(func.json_agg(_product_json(Products.__table__.c)))
+).where(Products.in_stock == False)
+_MOST_EXPENSIVE_JSON = select(_json_array(func.json_agg(
+    aggregate_order_by(_product_json(_top_priced.c), _top_priced.c.price.desc())
+)))
+_CATEGORY_COUNTS_JSON = select(_json_array(func.json_agg(func.json_build_object(
+    'category', category_stats.c.category, 'count', category_stats.c.product_count
+))))
+_CATEGORY_VALUES_JSON = select(_json_array(func.json_agg(func.json_build_object(
+    'category', category_stats.c.category, 'sum', cast(category_stats.c.total_value, Float)
+))))
+
 #Total inventory value
+@cache.memoize()
 def total_value_service():
     """
     Calculate the total inventory value by summing the product of price and quantity for all products.
@@ -218,10 +920,14 @@ def total_value_service():
     Returns:
         float: The total value of all products in inventory. Returns 0 if no products exist.
     """
-    return db.session.query(func.sum(Products.price * Products.quantity)).scalar() or 0
+    # Summed over the per-category rows of the category_stats view.
+    # Numeric aggregates come back as Decimal; a float keeps the JSON a number
+    total = db.session.execute(lambda_stmt(lambda: select(func.sum(category_stats.c.total_value)))).scalar()
+    return float(total or 0)
 
 
 #average product price
+@cache.memoize()
 def avg_product_price_service():
     """
     Calculate the average price of all products.
@@ -229,10 +935,14 @@ def avg_product_price_service():
     Returns:
         float: The average price of products. Returns 0 if no products exist.
     """
-    return db.session.query(func.avg(Products.price)).scalar() or 0
+    average = db.session.execute(lambda_stmt(
+        lambda: select(func.sum(category_stats.c.total_price) / func.sum(category_stats.c.product_count))
+    )).scalar()
+    return float(average or 0)
 
 
 #max/min price
+@cache.memoize()
 def min_max_price_service():
     """
     Retrieve the minimum and maximum product prices.
@@ -241,39 +951,42 @@ def min_max_price_service():
         tuple: A tuple containing (max_price, min_price).
                Both values are floats. Returns (0, 0) if no products exist.
     """
-    min_price = db.session.query(func.min(Products.price)).scalar() or 0
-    max_price = db.session.query(func.max(Products.price)).scalar() or 0
-    return (max_price, min_price)
+    # Both aggregates in one table scan / round-trip
+    min_price, max_price = db.session.execute(
+        lambda_stmt(lambda: select(func.min(Products.price), func.max(Products.price)))
+    ).one()
+    return (float(max_price or 0), float(min_price or 0))
 
 
 #total number of products per category
+@cache.memoize()
 def total_nb_of_products_category_service():
     """
     Count the total number of products grouped by category.
     ---
     Returns:
-        list of dict: Each dictionary contains 'category' (str) and 'count' (int) keys,
-                      representing the category name and the number of products in that category.
+        str: JSON array of objects with 'category' (str) and 'count' (int) keys,
+             representing the category name and the number of products in that category.
     """
-    results = db.session.query(Products.category, func.count(Products.id)).group_by(Products.category).all()
-    return [{"category": category, "count": count} for category, count in results]
+    return db.session.execute(_CATEGORY_COUNTS_JSON).scalar()
 
 
 #out-of-stock products
+@cache.memoize()
 def out_of_stock_service():
     """
     Retrieve all products that are out of stock.
     ---
-    A product is considered out of stock if its quantity is zero or its in_stock flag is False.
+    A product is considered out of stock when its generated in_stock column (quantity > 0) is False.
 
     Returns:
-        list of dict: A list of products represented as dictionaries that are currently out of stock.
+        str: JSON array of the products that are currently out of stock.
     """
-    results = Products.query.filter(or_(Products.quantity == 0, Products.in_stock == False)).all()
-    return [product.to_dict() for product in results]
+    return db.session.execute(_OUT_OF_STOCK_JSON).scalar()
 
 
 #5 most expensive items
+@cache.memoize()
 def most_expensive_products_service():
     """
     Retrieve the top 5 most expensive products.
@@ -281,13 +994,13 @@ def most_expensive_products_service():
     Products are ordered by price in descending order and limited to the first 5 entries.
 
     Returns:
-        list of dict: A list of up to 5 products represented as dictionaries with the highest prices.
+        str: JSON array of up to 5 products with the highest prices.
     """
-    results = Products.query.order_by(Products.price.desc()).limit(5)
-    return [product.to_dict() for product in results]
+    return db.session.execute(_MOST_EXPENSIVE_JSON).scalar()
 
 
 #total value per category
+@cache.memoize()
 def value_per_category_service():
     """
     Calculate the total value of products grouped by category.
@@ -295,12 +1008,11 @@ def value_per_category_service():
     The total value for each category is the sum of (quantity * price) of all products in that category.
 
     Returns:
-        list of dict: A list of dictionaries where each dictionary contains:
+        str: JSON array of objects, each containing:
             - "category" (str): The product category.
             - "sum" (float): The total value of products in that category.
     """
-    results = db.session.query(Products.category,func.sum(Products.quantity * Products.price)).group_by(Products.category)
-    return [{"category": category, "sum": sum} for category, sum in results]
+    return db.session.execute(_CATEGORY_VALUES_JSON).scalar()
 
 #batch classifying
 def classify_batch_service(product_ids):
@@ -338,17 +1050,22 @@ def classify_batch_service(product_ids):
       400:
         description: One or more product IDs were not found
     """
-    products = Products.query.filter(Products.id.in_(product_ids)).all()
-    if len(products) != len(product_ids):
+    rows = db.session.execute(
+        select(Products.id, Products.name).where(Products.id.in_(product_ids))
+    ).all()
+    if len(rows) != len(set(product_ids)):
         return None
+    _release_connection()
+
+    # Products sharing a name are classified with one model call
+    names = list(dict.fromkeys(row.name for row in rows))
+    categories = dict(zip(names, invoke_bedrock_category_batch(names)))
 
-    updated_products = []
-    for product in products:
-        category = invoke_bedrock_category(product.name)
-        product.category = category
-        updated_products.append({'id': product.id, 'category': category})
+    updated_products = [{'id': row.id, 'category': categories[row.name]} for row in rows]
+    db.session.execute(update(Products), updated_products)
 
     db.session.commit()
+    _invalidate_read_caches()
     return updated_products
 
 
@@ -411,16 +1128,32 @@ def translate_name_description_service(products_ids):
       500:
         description: Internal server error
     """
-    products = Products.query.filter(Products.id.in_(products_ids)).all()
-    if len(products) != len(products_ids):
+    rows = db.session.execute(
+        select(*LIST_COLUMNS).where(Products.id.in_(products_ids))
+    ).all()
+    if len(rows) != len(set(products_ids)):
         return None  # You can customize this error handling
-    
-    for product in products:
-        product.arabic_name = translate(product.name)
-        product.arabic_description = translate(product.description)
+    _release_connection()
+
+    translations = translate_many(
+        [row.name for row in rows] + [row.description for row in rows]
+    )
+    translated = list(zip(rows, translations[:len(rows)], translations[len(rows):]))
+
+    # The response is built from the rows already in hand instead of
+    # re-reading the products after the write
+    db.session.execute(update(Products), [
+        {'id': row.id, 'arabic_name': arabic_name, 'arabic_description': arabic_description}
+        for row, arabic_name, arabic_description in translated
+    ])
+    updated_products = [
+        {**Products.serialize(row), 'arabic_name': arabic_name, 'arabic_description': arabic_description}
+        for row, arabic_name, arabic_description in translated
+    ]
 
     db.session.commit()
-    return products
+    _invalidate_read_caches()
+    return updated_products
 
 
 #generate embeddings
@@ -459,21 +1192,32 @@ def generate_embedding_service(product_ids):
       500:
         description: Internal server error
     """
-    products = Products.query.filter(Products.id.in_(product_ids)).all()
-    if len(products) != len(product_ids):
+    # Only the columns needed to embed; existing vectors are never loaded
+    rows = db.session.execute(
+        select(Products.id, Products.name).where(Products.id.in_(product_ids))
+    ).all()
+    if len(rows) != len(set(product_ids)):
         return None
+    _release_connection()
 
-    updated_products = []
-    for product in products:
-        embedding = invoke_bedrock_embedding(product.name)
-        product.embedding = embedding
-        updated_products.append({'embedding': embedding})
+    # Products sharing a name are embedded once and get the same vector
+    names = list(dict.fromkeys(row.name for row in rows))
+    embeddings = dict(zip(names, map(_embedding_values, invoke_bedrock_embeddings_batch(names))))
+
+    values = [{'id': row.id, **embeddings[row.name]} for row in rows]
+    if len(values) >= COPY_EMBEDDINGS_MIN_ROWS:
+        _copy_embeddings(values)
+    else:
+        db.session.execute(update(Products), values)
+    updated_products = [{'embedding': embeddings[row.name]['embedding']} for row in rows]
 
     db.session.commit()
+    _invalidate_read_caches()
+    _update_similarity_matrix({value['id']: value['embedding'] for value in values})
     return updated_products
 
 
-def similarity_search_by_id_service(id, limit=5):
+def similarity_search_by_id_service(id, limit=5, ef_search=None):
     """
     Perform similarity search for a given product based on its embedding.
 
@@ -492,6 +1236,11 @@ def similarity_search_by_id_service(id, limit=5):
         required: false
         default: 5
         description: Number of similar products to return
+      - name: ef
+        in: query
+        type: integer
+        required: false
+        description: HNSW candidate list size for this search (recall vs latency)
     responses:
       200:
         description: List of similar products
@@ -509,36 +1258,75 @@ def similarity_search_by_id_service(id, limit=5):
       404:
         description: Product not found or no embedding available
     """
-    product = Products.query.get(id)
-    if not product or product.embedding is None:
+    # One lookup in the state picked up here; a product it lacks (e.g. deleted
+    # meanwhile) is left to Postgres
+    state = _get_similarity_matrix()
+    row = state["rows"].get(id) if state is not None else None
+    if row is not None:
+        return _search_similarity_matrix(state, state["matrix"][row], limit, exclude_row=row)
+
+    # The target is its own nearest candidate and is filtered out afterwards
+    _set_ef_search(ef_search, limit + 1)
+    results = [
+        {"id": row.id, "name": row.name}
+        for row in db.session.execute(_SIMILAR_TO_PRODUCT, {"target_id": id, "k": limit})
+    ]
+    # No rows means either no other products or no target vector; only then
+    # is the second query needed to tell them apart (None for a 404)
+    if not results and db.session.execute(
+        select(Products.id).where(Products.id == id, Products.embedding.isnot(None))
+    ).first() is None:
         return None
 
-    target_embedding = product.embedding.tolist()
-    # Convert list to PostgreSQL vector literal string
-    vector_literal = f"'[{','.join(map(str, target_embedding))}]'::vector({len(target_embedding)})"
+    return results
 
 
-    query = text(f"""
-                 SELECT id, name, embedding, embedding <#> {vector_literal} AS similarity
-                 FROM inventory.products
-                 WHERE id != :target_id
-                 ORDER BY similarity
-                 LIMIT :limit
-                 """)
+def similarity_search_batch_service(product_ids, limit=5, ef_search=None):
+    """
+    Perform similarity search for several products in one round-trip.
+    ---
+    Args:
+        product_ids (list[int]): IDs of the target products.
+        limit (int): Number of similar products to return per target.
+        ef_search (int, optional): HNSW candidate list size for these searches.
 
+    Returns:
+        list of dict or None: One {"id", "similar_products"} entry per distinct
+        target, in request order; None if any product is missing or has no
+        embedding.
+    """
+    product_ids = list(dict.fromkeys(product_ids))
 
-    results = db.session.execute(
-        query,
-        {
-            "target_id": id,
-            "limit": limit
+    state = _get_similarity_matrix()
+    target_rows = [state["rows"].get(product_id) for product_id in product_ids] if state is not None else [None]
+    if None not in target_rows:
+        top_ids = {
+            product_id: _matrix_top_ids(state, state["matrix"][row], limit, exclude_row=row)
+            for product_id, row in zip(product_ids, target_rows)
         }
-    )
+        # One name lookup for every neighbour across all targets.
+        names = _product_names({i for ids in top_ids.values() for i in ids})
+        return [
+            {"id": product_id, "similar_products": [
+                {"id": i, "name": names[i]} for i in top_ids[product_id] if i in names
+            ]}
+            for product_id in product_ids
+        ]
+
+    # Each target is its own nearest candidate and is filtered out afterwards
+    _set_ef_search(ef_search, limit + 1)
+    similar = {}
+    for row in db.session.execute(_SIMILAR_BATCH, {"ids": product_ids, "limit": limit}):
+        neighbours = similar.setdefault(row.query_id, [])
+        if row.id is not None:
+            neighbours.append({"id": row.id, "name": row.name})
+    if len(similar) != len(product_ids):
+        return None
 
-    return [{"id": row.id, "name": row.name} for row in results]
+    return [{"id": product_id, "similar_products": similar[product_id]} for product_id in product_ids]
 
 
-def similarity_search_by_name_service(name, limit=5):
+def similarity_search_by_name_service(name, limit=5, ef_search=None):
     """
     Generate an embedding for the given name and perform similarity search in the product database.
 
@@ -555,6 +1343,11 @@ def similarity_search_by_name_service(name, limit=5):
         required: false
         default: 5
         description: Number of similar products to return.
+      - name: ef
+        in: body
+        type: integer
+        required: false
+        description: HNSW candidate list size for this search (recall vs latency).
 
     returns:
       type: list
@@ -568,22 +1361,30 @@ def similarity_search_by_name_service(name, limit=5):
             type: string
             description: Product name
     """
-    target_embedding = invoke_bedrock_embedding(name)
-
-    vector_literal = f"'[{','.join(map(str, target_embedding))}]'::vector({len(target_embedding)})"
-
-    query = text(f"""
-                 SELECT id, name, embedding <#> {vector_literal} AS similarity
-                 FROM inventory.products
-                 WHERE embedding IS NOT NULL
-                 ORDER BY similarity
-                 LIMIT :limit
-                 """)
+    # Repeated queries skip Bedrock; near-identical ones skip the search too
+    normalized_name = name.strip().lower()
+    target_embedding = _embed_query(normalized_name)
+    key = (normalized_name, limit, ef_search)
+    cached = _lookup_similar_query(key, target_embedding)
+    if cached is not None:
+        return cached
 
-    results = db.session.execute(
-        query,
-        {
-            "limit": limit
-        }
-    )
-    return [{"id": row.id, "name": row.name} for row in results]
\ No newline at end of file
+    state = _get_similarity_matrix()
+    if state is not None:
+        results = _search_similarity_matrix(state, target_embedding, limit)
+    else:
+        # Inner-product distance (<#>) is computed inside Postgres: candidates
+        # from the 256-d index are reranked against the full unit query vector,
+        # and only the top `limit` ids and names come back.
+        # The first pass must return every candidate, so ef_search covers them
+        candidates = max(RERANK_CANDIDATES, limit)
+        _set_ef_search(ef_search, candidates)
+        rows = db.session.execute(_SIMILAR_BY_EMBEDDING, {
+            "q": target_embedding,
+            "q_short": _normalize_embedding(target_embedding[:SHORT_EMBEDDING_DIMENSIONS]),
+            "candidates": candidates,
+            "k": limit,
+        })
+        results = [{"id": row.id, "name": row.name} for row in rows]
+    _store_similar_query(key, target_embedding, results)
+    return results
\ No newline at end of file
@@ -1,5 +1,15 @@
+from functools import lru_cache
+
 from marshmallow import ValidationError
 
+
+@lru_cache(maxsize=None)
+def _schema_for(schema_class, partial):
+    # Schemas hold no per-load state, so one instance per class/partial
+    # combination is reused instead of rebuilding its fields every request
+    return schema_class(partial=partial)
+
+
 def validate_input(schema_class, data, partial=False):
     """
     Validate input data against a Marshmallow schema.
@@ -21,9 +31,9 @@ def validate_input(schema_class, data, partial=False):
         # Partial validation (PUT)
         valid_data, errors = validate_input(ProductSchema, request.get_json(), partial=True)
     """
-    schema = schema_class()
+    schema = _schema_for(schema_class, partial)
     try:
-        return schema.load(data, partial=partial), None
+        return schema.load(data), None
     except ValidationError as err:
         return None, err.messages
 
@@ -0,0 +1,40 @@
+import os
+
+import pytest
+from sqlalchemy import text
+
+# config reads DATABASE_URL at import; point it at the test database so the
+# suite never falls back to Secrets Manager or touches a real catalog.
+# Tests that need Postgres (pgvector >= 0.7 for halfvec) are skipped unless
+# TEST_DATABASE_URL is set.
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL", "postgresql://localhost/inventory_test")
+
+
+@pytest.fixture
+def app():
+    from app import app
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def database(app):
+    """A freshly created inventory schema, inside an app context."""
+    if not os.getenv("TEST_DATABASE_URL"):
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    from modules.products.extension import db
+
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+            connection.execute(text("DROP SCHEMA IF EXISTS inventory CASCADE"))
+            connection.execute(text("CREATE SCHEMA inventory"))
+        db.create_all()
+        yield db
+        db.session.remove()
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from sqlalchemy import insert, select, text
+
+import modules.products.services as services
+from modules.products.model import Products
+
+PRODUCT_COUNT = 60
+
+
+@pytest.fixture
+def product_ids(database, monkeypatch):
+    """Ids of PRODUCT_COUNT products with random embeddings."""
+    # Serve every search from Postgres rather than the in-memory matrix
+    monkeypatch.setattr(services, "_get_similarity_matrix", lambda: None)
+
+    rng = np.random.default_rng(0)
+    database.session.execute(insert(Products), [
+        {
+            "name": f"product {i}",
+            "description": "test product",
+            "price": 10,
+            "quantity": 1,
+            "category": "Test",
+            **services._embedding_values(rng.standard_normal(1024).astype(np.float32)),
+        }
+        for i in range(PRODUCT_COUNT)
+    ])
+    database.session.commit()
+    return database.session.execute(select(Products.id).order_by(Products.id)).scalars().all()
+
+
+def _force_index_scan(database):
+    # A catalog this small is otherwise read with a sequential scan, which
+    # never runs into the ef_search cap
+    database.session.execute(text("SET LOCAL enable_seqscan = off"))
+
+
+@pytest.mark.parametrize("limit", [40, 41, PRODUCT_COUNT - 2])
+def test_similarity_by_id_returns_limit_rows(database, product_ids, limit):
+    _force_index_scan(database)
+    results = services.similarity_search_by_id_service(product_ids[0], limit=limit)
+
+    assert len(results) == limit
+    assert product_ids[0] not in {product["id"] for product in results}
+
+
+@pytest.mark.parametrize("limit", [40, 41, PRODUCT_COUNT - 2])
+def test_similarity_batch_returns_limit_rows(database, product_ids, limit):
+    _force_index_scan(database)
+    results = services.similarity_search_batch_service(product_ids[:3], limit=limit)
+
+    assert [entry["id"] for entry in results] == product_ids[:3]
+    for entry in results:
+        assert len(entry["similar_products"]) == limit
+        assert entry["id"] not in {product["id"] for product in entry["similar_products"]}
+
+
+@pytest.mark.parametrize("name", ["", "   ", "\t\n"])
+def test_similarity_by_name_rejects_blank_name(client, name):
+    response = client.get("/products/similarity_by_name", query_string={"name": name})
+
+    assert response.status_code == 400
+    assert response.json == {"error": "Missing 'name' query parameter"}